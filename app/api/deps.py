@@ -1,16 +1,27 @@
-from typing import Generator, Annotated
+from typing import AsyncGenerator, Generator, Annotated
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.session import SessionLocal
+from app.db.session import AsyncSessionLocal, SessionLocal
 from app.models.user import User
 from fastapi import Depends
 
 def get_db() -> Generator[Session, None, None]:
+    """
+    Request-scoped session. It only checks out a connection on its first query
+    and holds it until commit, rollback or close, so code that makes slow
+    external calls reads first, closes the session (returning the connection
+    to the pool), makes the call, then writes with the same session.
+    """
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
 async def get_current_user() -> User:
     """
     Mock dependency for development/testing before implementing real authentication.
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import books, reading_sessions, auth, quiz, notes
+from app.api.v1.endpoints import books, reading_sessions, auth, quiz, notes, metrics, jobs
 
 api_router = APIRouter()
 
@@ -7,4 +7,6 @@ api_router.include_router(auth.router, prefix="/auth", tags=["authentication"])
 api_router.include_router(books.router, prefix="/books", tags=["books"])
 api_router.include_router(reading_sessions.router, prefix="/reading-sessions", tags=["reading-sessions"])
 api_router.include_router(quiz.router, prefix="/quiz", tags=["quiz"])
-api_router.include_router(notes.router, prefix="/notes", tags=["notes"])
\ No newline at end of file
+api_router.include_router(notes.router, prefix="/notes", tags=["notes"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["metrics"])
\ No newline at end of file
@@ -17,7 +17,7 @@ async def apple_auth(
     db: Session = Depends(get_db)
 ):
     # Verify Apple JWT
-    user_data = verify_apple_token(auth_request.id_token)
+    user_data = await verify_apple_token(auth_request.id_token)
     if not user_data:
         raise HTTPException(status_code=401, detail="Invalid token")
 
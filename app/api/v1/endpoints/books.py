@@ -1,16 +1,26 @@
 from fastapi import APIRouter, HTTPException, Query, Depends
+from fastapi.responses import JSONResponse
+from datetime import datetime
 from typing import Optional, List
-from app.services.book import search_books, get_book_details, scrape_toc_from_bn, parse_toc_to_json
-from app.schemas.book import BookSearchResponse, BookDetailResponse, ToCResponse
+from app.services.book import search_books
+from app.services.book_catalog import get_or_fetch_book
+from app.services.toc import get_stored_toc, get_active_toc_failure, request_toc_scrape, get_toc_batch
+from app.schemas.book import BookSearchResponse, BookDetailResponse, ToCResponse, ToCBatchRequest, ToCBatchResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.api import deps
-from app.models.table_of_contents import TableOfContents
 from app.services.book_progress import BookProgressService
 from app.schemas.book_progress import BookProgress
 from app.models.book_progress import BookProgressStatus
 from app.schemas.book_progress import BookProgressRequest
+from app.schemas.job import JobAccepted
+from app.core.config import get_settings
+from app.utils.circuit_breaker import CircuitOpen
+from app.utils.deadline import DeadlineExceeded
+from app.utils.limiter import UpstreamSaturated
 
 router = APIRouter()
+settings = get_settings()
 
 @router.get("/search", response_model=BookSearchResponse)
 async def search_books_endpoint(
@@ -26,14 +36,16 @@ async def search_books_endpoint(
 	- **max_results**: Maximum number of results to return (default: 10, max: 40)
 	"""
 	try:
-			result = search_books(q, lang, max_results)
+			result = await search_books(q, lang, max_results)
 			return result
+	except (UpstreamSaturated, CircuitOpen, DeadlineExceeded):
+			raise  # 503 with Retry-After / 504, see main.py
 	except Exception as e:
 			raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/currently-reading", response_model=List[BookProgress])
 async def get_currently_reading(
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	current_user = Depends(deps.get_current_user)
 ):
 	"""
@@ -47,7 +59,7 @@ async def get_currently_reading(
 
 @router.get("/completed-books", response_model=List[BookProgress])
 async def get_completed_books(
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	current_user = Depends(deps.get_current_user)
 ):
 	"""
@@ -62,7 +74,7 @@ async def get_completed_books(
 @router.post("/progress", response_model=BookProgress)
 async def create_book_progress(
 	request: BookProgressRequest,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	current_user = Depends(deps.get_current_user)
 ):
 	"""
@@ -75,50 +87,81 @@ async def create_book_progress(
 		total_chapters=request.total_chapters
 	)
 
+@router.post("/toc:batch", response_model=ToCBatchResponse)
+def get_table_of_contents_batch(
+	request: ToCBatchRequest,
+	db: Session = Depends(deps.get_db)
+):
+	"""
+	Get tables of contents for many books in one round trip.
+
+	Each book is reported as `ready` (with its TOC), `pending` (scrape already
+	in progress), `queued` (scrape queued by this request) or `failed` (recent
+	scrape found no TOC; see `next_retry_at`). Poll `status_url` or repeat the
+	batch for books that aren't ready.
+	"""
+	results = get_toc_batch(db, request.book_ids)
+	for item in results.values():
+		if item.get("job_id"):
+			item["status_url"] = f"{settings.API_V1_STR}/jobs/{item['job_id']}"
+	return {"results": results}
+
 @router.get("/{book_id}", response_model=BookDetailResponse)
-async def get_book_details_endpoint(book_id: str):
+async def get_book_details_endpoint(
+	book_id: str,
+	db: AsyncSession = Depends(deps.get_async_db)
+):
 	"""
 	Get detailed information about a specific book by its ID.
+	Served from the local books catalog, fetched from Google Books on first lookup.
 	"""
 	try:
-			book = get_book_details(book_id)
+			book = await get_or_fetch_book(db, book_id)
 			return book
+	except (UpstreamSaturated, CircuitOpen, DeadlineExceeded):
+			raise  # 503 with Retry-After / 504, see main.py
 	except Exception as e:
 			raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/{book_id}/toc", response_model=ToCResponse)
+@router.get(
+	"/{book_id}/toc",
+	response_model=ToCResponse,
+	responses={
+		202: {"model": JobAccepted, "description": "TOC is being scraped in the background"},
+		404: {"description": "A recent scrape found no TOC; retry after the Retry-After header"}
+	}
+)
 async def get_table_of_contents_endpoint(
 	book_id: str,
-	db: Session = Depends(deps.get_db)
+	db: AsyncSession = Depends(deps.get_async_db)
 ):
 	"""
-	Get table of contents for a book. 
-	First checks database, if not found scrapes from Barnes & Noble.
+	Get table of contents for a book.
+	Served from the database; on a miss a background scrape from Barnes & Noble
+	is queued and 202 is returned with a job status URL to poll.
+	Books whose last scrape failed return 404 until their backoff expires.
 	"""
-	# Try to get from database first
-	toc = db.query(TableOfContents).filter(
-		TableOfContents.book_id == book_id
-	).first()
-
+	toc = await get_stored_toc(db, book_id)
 	if toc:
 		return {"toc": toc.content}
 
-	# If not in database, scrape from B&N
-	book_details = get_book_details(book_id)
-	toc_text = scrape_toc_from_bn(
-		book_title=book_details["volumeInfo"]["title"],
-		author_name=book_details["volumeInfo"]["authors"][0]
-	)	
-	# Parse the scraped text to JSON format with chapter numbers
-	toc_data = parse_toc_to_json(toc_text)
-	
-	# Save to database
-	new_toc = TableOfContents(
-		book_id=book_id,
-		content=toc_data["toc"]  # Save the formatted data with chapter numbers
-	)
-	db.add(new_toc)
-	db.commit()
-	db.refresh(new_toc)
+	failure = await get_active_toc_failure(db, book_id)
+	if failure:
+		retry_after = int((failure.next_retry_at - datetime.utcnow()).total_seconds()) + 1
+		raise HTTPException(
+			status_code=404,
+			detail={
+				"message": "Table of contents not available",
+				"reason": failure.reason,
+				"next_retry_at": failure.next_retry_at.isoformat()
+			},
+			headers={"Retry-After": str(retry_after)}
+		)
 
-	return {"toc": new_toc.content}  # Return the saved content instead of raw toc_data 
\ No newline at end of file
+	job_id = await request_toc_scrape(db, book_id)
+	status_url = f"{settings.API_V1_STR}/jobs/{job_id}"
+	return JSONResponse(
+		status_code=202,
+		content=JobAccepted(job_id=job_id, status_url=status_url).model_dump(),
+		headers={"Location": status_url}
+	)
@@ -0,0 +1,21 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.models.job import Job
+from app.schemas.job import Job as JobSchema
+
+router = APIRouter()
+
+@router.get("/{job_id}", response_model=JobSchema)
+def get_job_status(
+    job_id: int,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Get the status of a background job, e.g. a TOC scrape queued by `/books/{book_id}/toc`.
+    """
+    job = db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,114 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+from app.api import deps
+from app.db.pool import pool_status
+from app.db.session import async_engine, engine
+from app.utils.metrics import metrics
+from app.services.book import search_cache, details_cache
+from app.services.jobs import get_queue_stats
+from app.services.llm_ledger import get_llm_usage
+from app.services.quiz import quiz_model_tiers
+from app.utils.circuit_breaker import breakers
+from app.utils.limiter import limiters
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics():
+    """
+    In-process counters, gauges and timings for this worker.
+    """
+    return metrics.snapshot()
+
+@router.get("/cache")
+async def get_cache_metrics():
+    """
+    Hit/miss counters and current size of the Google Books caches.
+    """
+    snapshot = metrics.snapshot(prefix="cache.")
+    return {
+        "entries": {
+            search_cache.name: len(search_cache),
+            details_cache.name: len(details_cache),
+        },
+        "counters": snapshot["counters"],
+    }
+
+@router.get("/limiters")
+async def get_limiter_metrics():
+    """
+    Current state of each upstream limiter plus queue-time and rejection metrics.
+    """
+    snapshot = metrics.snapshot(prefix="limiter.")
+    return {
+        "limiters": {name: limiter.state() for name, limiter in limiters.items()},
+        "counters": snapshot["counters"],
+        "timings": snapshot["timings"],
+    }
+
+@router.get("/db")
+async def get_db_metrics():
+    """
+    Connection pool state for this process plus checkout wait and hold times.
+    `long_holds` counts connections held past DB_CONNECTION_HOLD_WARN_SECONDS.
+    """
+    snapshot = metrics.snapshot(prefix="db.pool.")
+    return {
+        "pools": {
+            "sync": pool_status(engine.pool),
+            "async": pool_status(async_engine.sync_engine.pool),
+        },
+        "counters": snapshot["counters"],
+        "timings": snapshot["timings"],
+    }
+
+@router.get("/circuits")
+async def get_circuit_metrics():
+    """
+    Current state of each upstream circuit breaker plus state-change and
+    rejection counters, and how often request deadlines cut calls short.
+    """
+    return {
+        "breakers": {name: breaker.snapshot() for name, breaker in breakers.items()},
+        "counters": {
+            **metrics.snapshot(prefix="circuit.")["counters"],
+            **metrics.snapshot(prefix="deadline.")["counters"],
+        },
+    }
+
+@router.get("/jobs")
+def get_job_metrics(db: Session = Depends(deps.get_db)):
+    """
+    Background job queue depth per kind/status and age of the oldest runnable job.
+    """
+    return get_queue_stats(db)
+
+@router.get("/quiz")
+async def get_quiz_metrics():
+    """
+    Quiz cache counters and per model tier latency, success rate and escalation rate.
+    """
+    snapshot = metrics.snapshot(prefix="quiz.")
+    counters, timings = snapshot["counters"], snapshot["timings"]
+    tiers = {}
+    for model, _ in quiz_model_tiers():
+        prefix = f"quiz.tier.{model}."
+        attempts = sum(counters.get(prefix + outcome, 0) for outcome in ("success", "timeout", "invalid"))
+        tiers[model] = {
+            "attempts": attempts,
+            "success_rate": counters.get(prefix + "success", 0) / attempts if attempts else None,
+            "escalation_rate": counters.get(prefix + "escalated", 0) / attempts if attempts else None,
+            "latency_seconds": timings.get(prefix + "latency_seconds"),
+        }
+    return {"tiers": tiers, "counters": counters}
+
+@router.get("/llm")
+def get_llm_metrics(
+    days: int = Query(7, ge=1, le=90),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    From the LLM call ledger: p50/p95/p99 latency and success rate per endpoint
+    and model, plus calls, cache hits and prompt/completion tokens per day per endpoint.
+    """
+    return get_llm_usage(db, days)
@@ -1,14 +1,32 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from app.api import deps
 from app.core.config import get_settings
-from app.schemas.quiz import QuizRequest, QuizResponse, QuizQuestion
+from app.schemas.quiz import QuizRequest, QuizResponse, QuizBatchRequest, QuizBatchResponse, QuizPregenerationStatus
+from app.services.llm_ledger import set_llm_endpoint
+from app.services.quiz import (
+    get_or_generate_quiz,
+    get_or_generate_quizzes,
+    get_pregeneration_progress,
+    serve_cached_quiz,
+    stream_quiz,
+)
+from app.utils.circuit_breaker import CircuitOpen, openai_breaker
+from app.utils.deadline import DeadlineExceeded
+from app.utils.executor import run_blocking
+from app.utils.limiter import UpstreamSaturated
 import json
-from openai import OpenAI
 
 router = APIRouter()
 settings = get_settings()
 
 @router.post("/generate-quiz", response_model=QuizResponse)
-async def generate_quiz(request: QuizRequest):
+async def generate_quiz(
+    request: QuizRequest,
+    db: Session = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_user)
+):
     """
     Generate quiz questions for a specific chapter of a book.
 
@@ -16,95 +34,145 @@ async def generate_quiz(request: QuizRequest):
     - book_name: The name of the book
     - chapter_name: The name or number of the chapter
     - author_name: The name of the book's author
+    - book_id (optional): Google Books volume ID
+    - chapter_number (optional): Chapter number from the book's table of contents
+    - no_repeat (optional): Avoid questions the current user has already been served
 
     Returns:
     - A list of 3 multiple choice questions with their correct answers
     
     The questions are generated using OpenAI's GPT model and are designed to test
     comprehension of the chapter's key elements, themes, and developments.
+    A pool of questions is generated once per book, author and chapter and each
+    quiz samples 3 of them, so only the first reader of a chapter waits for
+    generation and repeat quizzes still vary.
     """
+    set_llm_endpoint("quiz.generate")
     try:
-        # Initialize OpenAI client
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
-        
-        # Create a contextual prompt
-        prompt = f"""
-        Based on your knowledge of the book "{request.book_name}" by {request.author_name}, and the chapter title "{request.chapter_name}," generate 3 multiple-choice questions that reflect the key concepts likely discussed in this chapter. Assume the chapter explores ideas related to "{request.chapter_name}" as part of the book's overarching themes.
-        
-        Format the response as a JSON array with objects containing:
-        - question (string)
-        - options (array of 3 strings)
-        - correct_answer (number 0-2 indicating the index of correct option)        
-        
-        Return only the JSON array, without any markdown formatting or code block markers.
-        """
-        
-        # Make API call to OpenAI
-        completion = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": prompt}]
+        questions = await get_or_generate_quiz(
+            db,
+            book_name=request.book_name,
+            author_name=request.author_name,
+            chapter_name=request.chapter_name,
+            book_id=request.book_id,
+            chapter_number=request.chapter_number,
+            user_id=current_user.id if request.no_repeat else None,
         )
+        return QuizResponse(questions=questions)
 
-        # Get and clean the response
-        response_content = completion.choices[0].message.content.strip()
-        
-        # Remove markdown code block if present
-        if response_content.startswith("```"):
-            response_content = response_content.split("\n", 1)[1]  # Remove first line
-        if response_content.endswith("```"):
-            response_content = response_content.rsplit("\n", 1)[0]  # Remove last line
-        
-        # Remove "json" if it appears at the start
-        response_content = response_content.removeprefix("json")
-        
-        response_content = response_content.strip()
-        print("Cleaned Response:", response_content)  # Debug print
+    except (UpstreamSaturated, CircuitOpen, DeadlineExceeded):
+        raise  # 503 with Retry-After / 504, see main.py
+    except json.JSONDecodeError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to parse OpenAI response into JSON: {str(e)}"
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Invalid question format: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to generate quiz: {str(e)}"
+        )
 
+@router.post("/generate-quiz/stream")
+async def generate_quiz_stream(
+    request: QuizRequest,
+    http_request: Request,
+    db: Session = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_user)
+):
+    """
+    Streaming variant of /generate-quiz: each question is sent as soon as it has
+    been parsed and validated from the model output.
+
+    Sends newline-delimited JSON by default, or Server-Sent Events when the
+    client sends `Accept: text/event-stream`. Events:
+    - {"type": "question", "index": 0, "question": {...}}
+    - {"type": "done", "cached": false, "count": 3}
+    - {"type": "error", "detail": "...", "count": 1}
+    """
+    set_llm_endpoint("quiz.stream")
+    user_id = current_user.id if request.no_repeat else None
+    # Serve from the cache with the request's session; the stream itself outlives it
+    served = await serve_cached_quiz(db, request.book_name, request.author_name, request.chapter_name, user_id)
+    if served is None:
         try:
-            # Parse the response
-            questions = json.loads(response_content)
-            
-            # Validate the structure
-            validated_questions = []
-            for q in questions:
-                # Validate required fields
-                if not all(key in q for key in ["question", "options", "correct_answer"]):
-                    raise ValueError("Missing required fields in question")
-                
-                # Validate options array length
-                if not isinstance(q["options"], list) or len(q["options"]) != 3:
-                    raise ValueError("Options must be an array of 3 strings")
-                
-                # Validate correct_answer is in range
-                if not isinstance(q["correct_answer"], int) or q["correct_answer"] not in [0, 1, 2]:
-                    raise ValueError("correct_answer must be 0, 1, or 2")
+            # Fail before the 200 goes out rather than with an error event
+            openai_breaker.raise_if_open()
+        except CircuitOpen:
+            served = await serve_cached_quiz(
+                db, request.book_name, request.author_name, request.chapter_name, user_id, include_expired=True
+            )
+            if served is None:
+                raise
+    if served is None:
+        # The stream saves the pool with its own session; release this one's connection now
+        await run_blocking(db.close)
+    events = stream_quiz(
+        served,
+        book_name=request.book_name,
+        author_name=request.author_name,
+        chapter_name=request.chapter_name,
+        book_id=request.book_id,
+        chapter_number=request.chapter_number,
+        user_id=user_id,
+    )
 
-                validated_questions.append(
-                    QuizQuestion(
-                        question=q["question"],
-                        options=q["options"],
-                        correct_answer=q["correct_answer"]
-                    )
-                )
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        async def body():
+            async for event in events:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+        media_type = "text/event-stream"
+    else:
+        async def body():
+            async for event in events:
+                yield json.dumps(event) + "\n"
+        media_type = "application/x-ndjson"
 
-            return QuizResponse(questions=validated_questions)
+    return StreamingResponse(body(), media_type=media_type, headers={"Cache-Control": "no-cache"})
 
-        except json.JSONDecodeError as e:
-            print(f"JSON Decode Error: {str(e)}")  # Debug print
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to parse OpenAI response into JSON: {str(e)}"
-            )
-        except ValueError as e:
-            print(f"Validation Error: {str(e)}")  # Debug print
-            raise HTTPException(
-                status_code=500,
-                detail=f"Invalid question format: {str(e)}"
-            )
+@router.post("/generate-batch", response_model=QuizBatchResponse)
+async def generate_quiz_batch(
+    request: QuizBatchRequest,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Quizzes for several chapters of one book in a single call, e.g. for a
+    "review this book" flow.
 
-    except Exception as e:
-        print(f"General Error: {str(e)}")  # Debug print
+    Cached chapters are returned as-is; the rest are generated several chapters
+    per prompt, with a few prompts in flight at once. Each chapter is validated
+    on its own: a chapter that fails gets status "failed" with an error while the
+    others are still returned.
+    """
+    if len(request.chapters) > settings.QUIZ_BATCH_MAX_CHAPTERS:
         raise HTTPException(
-            status_code=500,
-            detail=f"Failed to generate quiz: {str(e)}"
-        ) 
\ No newline at end of file
+            status_code=400,
+            detail=f"At most {settings.QUIZ_BATCH_MAX_CHAPTERS} chapters per batch"
+        )
+
+    set_llm_endpoint("quiz.batch")
+    results = await get_or_generate_quizzes(
+        db,
+        book_name=request.book_name,
+        author_name=request.author_name,
+        chapters=[chapter.model_dump() for chapter in request.chapters],
+        book_id=request.book_id,
+    )
+    return QuizBatchResponse(results=results)
+
+@router.get("/pregeneration/{book_id}", response_model=QuizPregenerationStatus)
+def get_quiz_pregeneration_status(
+    book_id: str,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Progress of ahead-of-time quiz generation for a book. Quizzes are queued for
+    every chapter once the book's TOC is stored; overall queue depth is under
+    `/metrics/jobs` (kind `quiz.pregenerate`).
+    """
+    return get_pregeneration_progress(db, book_id)
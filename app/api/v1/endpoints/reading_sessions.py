@@ -1,6 +1,6 @@
-from typing import List, Any
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from typing import List, Any, Optional
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api import deps
 from app.schemas.reading_session import ReadingSession, ReadingSessionCreate, IntervalType
@@ -14,13 +14,13 @@ router = APIRouter()
 async def create_reading_session(
 	*,
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	session_in: ReadingSessionCreate,
 ) -> Any:
 	"""
 	Create new reading session for a book.
 	"""
-	return reading_session_service.create_session(
+	return await reading_session_service.create_session(
 		db=db,
 		user_id=current_user.id,
 		book_id=session_in.book_id,
@@ -28,67 +28,72 @@ async def create_reading_session(
 	)
 
 @router.get("/active", response_model=List[ReadingSession])
-def get_active_sessions(
+async def get_active_sessions(
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
+	max_intervals: Optional[int] = Query(None, ge=0, description="Most recent intervals to return per session"),
 ):
 	"""
 	Get all active reading sessions for current user.
 	"""
-	return reading_session_service.get_active_sessions(db=db, user_id=current_user.id)
+	return await reading_session_service.get_active_sessions(
+		db=db,
+		user_id=current_user.id,
+		max_intervals=max_intervals
+	)
 
 @router.post("/{session_id}/intervals")
-def create_interval(
+async def create_interval(
 	*,
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	session_id: int,
 	interval_type: IntervalType
 ):
 	"""Start a new interval in the reading session"""
-	return reading_session_service.start_new_interval(
+	return await reading_session_service.start_new_interval(
 		db=db, 
 		session_id=session_id,
 		interval_type=interval_type
 	)
 
 @router.post("/intervals/{interval_id}/pause")
-def pause_interval(
+async def pause_interval(
 	*,
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	interval_id: int,
 	remaining_time: int
 ):
 	"""Pause an active interval"""
-	return reading_session_service.pause_interval(
+	return await reading_session_service.pause_interval(
 		db=db,
 		interval_id=interval_id,
 		remaining_time=remaining_time
 	)
 
 @router.post("/intervals/{interval_id}/resume")
-def resume_interval(
+async def resume_interval(
 	*,
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	interval_id: int,
 ):
 	"""Resume an interval"""
-	return reading_session_service.resume_interval(
+	return await reading_session_service.resume_interval(
 		db=db,
 		interval_id=interval_id
 	)
 
 @router.post("/intervals/{interval_id}/complete")
-def complete_interval(
+async def complete_interval(
 	*,
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	interval_id: int,
 ):
 	"""Complete an interval"""
-	return reading_session_service.complete_interval(
+	return await reading_session_service.complete_interval(
 		db=db,
 		interval_id=interval_id
 	)
@@ -97,12 +102,14 @@ def complete_interval(
 async def complete_session(
 	*,
 	current_user: CurrentUser,
-	db: Session = Depends(deps.get_db),
+	db: AsyncSession = Depends(deps.get_async_db),
 	session_id: int,
+	max_intervals: Optional[int] = Query(None, ge=0, description="Most recent intervals to return"),
 ):
 	"""Complete a reading session"""
 	return await reading_session_service.complete_session(
 		db=db,
 		session_id=session_id,
-		user_id=current_user.id
+		user_id=current_user.id,
+		max_intervals=max_intervals
 	) 
\ No newline at end of file
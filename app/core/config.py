@@ -15,9 +15,109 @@ class Settings(BaseSettings):
     # OpenAi
     OPENAI_API_KEY: str | None = None  # Make it optional if needed
 
+    # Quiz cache: regenerate cached quizzes older than this (None keeps them forever)
+    QUIZ_CACHE_MAX_AGE_DAYS: int | None = None
+    QUIZ_POOL_SIZE: int = 15  # Questions generated and stored per chapter; each quiz samples from these
+
+    # Quiz model tiers, fastest first. A tier that times out or returns invalid
+    # questions escalates to the next; timeouts line up with the tiers
+    QUIZ_MODEL_TIERS: list[str] = ["gpt-4o-mini", "gpt-4o"]
+    QUIZ_MODEL_TIMEOUTS_SECONDS: list[float] = [20.0, 90.0]
+    QUIZ_GENERATION_MAX_ATTEMPTS: int = 3  # Attempts per generation; the last tier repeats after the chain
+    QUIZ_GENERATION_BUDGET_SECONDS: float = 120.0  # Deadline across all attempts of one generation
+
+    # LLM call ledger (llm_calls table), written in batches
+    LLM_LEDGER_ENABLED: bool = True
+    LLM_LEDGER_FLUSH_INTERVAL_SECONDS: float = 5.0
+    LLM_LEDGER_MAX_BUFFER: int = 10000  # Entries beyond this are dropped if the database is unreachable
+
+    # Quiz pre-generation: queue quizzes for every chapter once a book's TOC is stored
+    QUIZ_PREGEN_ENABLED: bool = True
+    QUIZ_PREGEN_CHAPTERS_PER_REQUEST: int = 5  # Chapters covered by one LLM call
+    QUIZ_PREGEN_MAX_CONCURRENT_PER_BOOK: int = 2  # Pre-generation jobs running at once for one book
+
+    # Batch quiz API
+    QUIZ_BATCH_MAX_CHAPTERS: int = 30
+    QUIZ_BATCH_MAX_CONCURRENCY: int = 4  # LLM calls in flight per batch request
+
     # Google Books
     GOOGLE_BOOKS_API_KEY: str | None = None  # Make it optional if needed
 
+    # Google Books response cache
+    BOOKS_CACHE_MAX_ENTRIES: int = 2048
+    BOOKS_SEARCH_CACHE_TTL_SECONDS: int = 15 * 60
+    BOOKS_DETAILS_CACHE_TTL_SECONDS: int = 24 * 60 * 60
+    BOOKS_CACHE_STALE_SECONDS: int = 60 * 60  # Serve stale entries this long while refreshing
+
+    # Local books catalog: rows older than this are re-fetched from Google Books
+    BOOK_CATALOG_REFRESH_DAYS: int = 30
+
+    # Outbound HTTP client
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+
+    # Upstream limiters: token bucket (rate/burst) plus in-flight cap per upstream API
+    LIMITER_MAX_WAIT_SECONDS: float = 5.0  # Interactive calls queue at most this long
+    LIMITER_BACKGROUND_MAX_WAIT_SECONDS: float = 60.0
+    GOOGLE_BOOKS_RATE_PER_SECOND: float = 10.0
+    GOOGLE_BOOKS_BURST: int = 20
+    GOOGLE_BOOKS_MAX_CONCURRENCY: int = 10
+    OPENAI_RATE_PER_SECOND: float = 5.0
+    OPENAI_BURST: int = 10
+    OPENAI_MAX_CONCURRENCY: int = 8
+    APPLE_KEYS_RATE_PER_SECOND: float = 2.0
+    APPLE_KEYS_BURST: int = 5
+    APPLE_KEYS_MAX_CONCURRENCY: int = 2
+    BARNES_NOBLE_RATE_PER_SECOND: float = 1.0
+    BARNES_NOBLE_BURST: int = 3
+    BARNES_NOBLE_MAX_CONCURRENCY: int = 2
+
+    # Request deadlines: every upstream call is bounded by what's left of the
+    # request's deadline (X-Request-Timeout header, else the route default)
+    REQUEST_DEADLINE_SECONDS: float = 15.0
+    REQUEST_DEADLINE_MIN_SECONDS: float = 1.0  # Client-supplied deadlines are clamped to this range
+    REQUEST_DEADLINE_MAX_SECONDS: float = 180.0
+    ROUTE_DEADLINES_SECONDS: dict[str, float] = {"/api/v1/quiz": 120.0}  # Longest matching path prefix wins
+
+    # Circuit breakers: an upstream opens after this many consecutive failures
+    # and gets one probe call once the recovery period is over
+    CIRCUIT_FAILURE_THRESHOLD: int = 5
+    CIRCUIT_RECOVERY_SECONDS: float = 30.0
+
+    # Thread pool for blocking work (Selenium scraping)
+    BLOCKING_POOL_SIZE: int = 4
+
+    # Selenium browser pool for the Barnes & Noble scraper
+    BROWSER_POOL_SIZE: int = 2
+    BROWSER_POOL_PREWARM: int = 1  # Browsers started when the worker boots
+    BROWSER_POOL_ACQUIRE_TIMEOUT_SECONDS: float = 5.0
+    BROWSER_POOL_RETRY_AFTER_SECONDS: int = 30
+    BROWSER_MAX_PAGES_PER_DRIVER: int = 50
+    BROWSER_MAX_MEMORY_MB: int = 512  # JS heap size after which a browser is recycled
+    BN_SCRAPE_STEP_TIMEOUT_SECONDS: float = 20.0  # Page loads and element waits, each
+    BN_SCRAPE_TIMEOUT_SECONDS: float = 45.0  # Whole Selenium scrape
+
+    # Background jobs
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: int = 30
+    JOB_RETRY_MAX_SECONDS: int = 60 * 60
+    JOB_LOCK_TIMEOUT_SECONDS: int = 10 * 60  # Running jobs older than this are requeued
+    WORKER_CONCURRENCY: int = 2
+    WORKER_POLL_INTERVAL_SECONDS: float = 1.0
+    RUN_WORKER_IN_PROCESS: bool = False  # Run the job worker inside the web process (single-dyno setups)
+
+    # Try plain HTTP + lxml before falling back to Selenium for TOC scrapes
+    TOC_HTTP_FAST_PATH_ENABLED: bool = True
+
+    # Negative cache for failed TOC scrapes: retry after base * 2^(attempts - 1), capped
+    TOC_FAILURE_BACKOFF_BASE_SECONDS: int = 6 * 60 * 60
+    TOC_FAILURE_BACKOFF_MAX_SECONDS: int = 30 * 24 * 60 * 60
+
+    # Shared cache backend (optional, requires the `redis` package)
+    REDIS_URL: str | None = None
+
     # Apple Sign In
     APPLE_BUNDLE_ID: str | None = None
     APPLE_PUBLIC_KEYS_URL: str = "https://appleid.apple.com/auth/keys"
@@ -27,6 +127,30 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str | None = None
     POSTGRES_SERVER: str = "localhost"
     POSTGRES_DB: str = "focus_read_db"
+
+    # Connection pools, per process: the async pool serves API endpoints, the
+    # sync pool jobs, scripts and the blocking pool. Keep
+    # processes * (size + overflow) of both under the Postgres plan's connection limit
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_ASYNC_POOL_SIZE: int = 10
+    DB_ASYNC_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0  # Max wait for a free connection
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    # Ping on every checkout (one extra round trip). Off: rely on pool_recycle,
+    # and a dropped connection fails one query and invalidates the pool
+    DB_POOL_PRE_PING: bool = False
+    DB_CONNECTION_HOLD_WARN_SECONDS: float = 5.0  # Log connections held longer than this, with their route
+
+    # Queries per request: requests over budget are logged, or fail with a 500
+    # in strict mode (tests, development) so N+1 patterns get caught
+    DB_QUERY_BUDGET_PER_REQUEST: int = 10
+    DB_QUERY_BUDGETS: dict[str, int] = {}  # Per-route overrides; longest matching path prefix wins
+    DB_QUERY_BUDGET_STRICT: bool = False
+
+    # Intervals returned per reading session, most recent first (None returns them all);
+    # intervals_count still has the total
+    READING_SESSION_MAX_INTERVALS: int | None = None
     
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> str:
@@ -40,6 +164,11 @@ class Settings(BaseSettings):
             
         # Use local database settings if no DATABASE_URL is set
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
+
+    @property
+    def SQLALCHEMY_ASYNC_DATABASE_URI(self) -> str:
+        # Same database through the asyncpg driver, for the async API session
+        return self.SQLALCHEMY_DATABASE_URI.replace("postgresql://", "postgresql+asyncpg://", 1)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,46 @@
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+from sqlalchemy import delete
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.models.lease import Lease
+
+settings = get_settings()
+
+@asynccontextmanager
+async def try_lease(key: str, ttl_seconds: Optional[float] = None) -> AsyncIterator[bool]:
+    """
+    Try to take the lease for `key` without waiting. Yields True if acquired;
+    the lease is released when the block exits.
+    Coordinates work across worker processes and dynos.
+
+    Claiming and releasing are two short transactions, so no database
+    connection is held while the locked work (a scrape, an LLM call) runs.
+    A holder that dies leaves its row behind; the lease can be taken over once
+    it expires, after `ttl_seconds` (default JOB_LOCK_TIMEOUT_SECONDS, which
+    also bounds how long a job can run).
+    """
+    holder = uuid.uuid4().hex
+    now = datetime.utcnow()
+    ttl = ttl_seconds if ttl_seconds is not None else settings.JOB_LOCK_TIMEOUT_SECONDS
+    stmt = insert(Lease).values(key=key, holder=holder, expires_at=now + timedelta(seconds=ttl))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Lease.key],
+        set_={"holder": stmt.excluded.holder, "expires_at": stmt.excluded.expires_at},
+        where=Lease.expires_at < now
+    ).returning(Lease.key)
+
+    async with AsyncSessionLocal() as db:
+        acquired = await db.scalar(stmt) is not None
+        await db.commit()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(Lease).where(Lease.key == key, Lease.holder == holder))
+                await db.commit()
@@ -0,0 +1,88 @@
+"""
+Connection pool instrumentation.
+
+Pools are created through TimedQueuePool / TimedAsyncQueuePool, which time
+how long each checkout waits for a connection, and `instrument_pool` hooks
+checkout/checkin events to export in-use and overflow gauges and hold times.
+Connections held longer than DB_CONNECTION_HOLD_WARN_SECONDS are logged with
+the route (or job) that held them.
+"""
+import time
+from contextvars import ContextVar
+
+from fastapi import Request
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+from app.core.config import get_settings
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+# What's using the database in the current task: "METHOD /path" for requests, "job.<kind>" for jobs
+db_route: ContextVar[str] = ContextVar("db_route", default="background")
+
+
+class _TimedCheckout:
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe(f"db.pool.{self._orig_logging_name}.checkout_seconds", time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(pool: Pool, name: str) -> None:
+    def update_gauges(returning: int = 0) -> None:
+        # The checkin event fires before the pool takes the connection back
+        metrics.gauge(f"db.pool.{name}.in_use", pool.checkedout() - returning)
+        metrics.gauge(f"db.pool.{name}.overflow", max(pool.overflow(), 0))
+
+    @event.listens_for(pool, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        metrics.incr(f"db.pool.{name}.connections_opened")
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.monotonic()
+        connection_record.info["route"] = db_route.get()
+        update_gauges()
+
+    @event.listens_for(pool, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        route = connection_record.info.pop("route", None)
+        update_gauges(returning=1)
+        if checked_out_at is None:
+            return
+        held = time.monotonic() - checked_out_at
+        metrics.observe(f"db.pool.{name}.hold_seconds", held)
+        if held > settings.DB_CONNECTION_HOLD_WARN_SECONDS:
+            metrics.incr(f"db.pool.{name}.long_holds")
+            print(f"DB connection ({name} pool) held for {held:.1f}s by {route}")
+
+
+def pool_status(pool: Pool) -> dict:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "idle": pool.checkedin(),
+    }
+
+
+async def db_route_middleware(request: Request, call_next):
+    """Label database connections checked out while handling this request"""
+    token = db_route.set(f"{request.method} {request.url.path}")
+    try:
+        return await call_next(request)
+    finally:
+        db_route.reset(token)
@@ -0,0 +1,79 @@
+"""
+Per-request query counting.
+
+`count_queries` hooks an engine so every statement it runs is counted against
+the current request's QueryCounter. `query_budget_middleware` reports the
+total as a metric and an X-DB-Query-Count header, and logs requests that go
+over their budget (DB_QUERY_BUDGET_PER_REQUEST, or the longest matching
+prefix in DB_QUERY_BUDGETS). With DB_QUERY_BUDGET_STRICT on, as in tests and
+development, those requests fail with a 500 instead so N+1 regressions
+surface before they ship.
+"""
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+
+
+class QueryCounter:
+    # Mutable so statements run in copied contexts (run_blocking) still count
+    def __init__(self):
+        self.count = 0
+
+
+# Counter for the current request; None outside a request (jobs, scripts)
+query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("query_counter", default=None)
+
+
+def count_queries(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def on_execute(connection, cursor, statement, parameters, context, executemany):
+        counter = query_counter.get()
+        if counter is not None:
+            counter.count += 1
+
+
+def route_query_budget(path: str) -> int:
+    """Per-route budget from DB_QUERY_BUDGETS (longest matching prefix wins)"""
+    matches = [prefix for prefix in settings.DB_QUERY_BUDGETS if path.startswith(prefix)]
+    if not matches:
+        return settings.DB_QUERY_BUDGET_PER_REQUEST
+    return settings.DB_QUERY_BUDGETS[max(matches, key=len)]
+
+
+async def query_budget_middleware(request: Request, call_next):
+    """
+    Count the queries this request runs. Queries made while a streaming body
+    is sent happen after this returns and aren't counted.
+    """
+    counter = QueryCounter()
+    token = query_counter.set(counter)
+    try:
+        response = await call_next(request)
+    finally:
+        query_counter.reset(token)
+
+    metrics.observe("db.queries_per_request", counter.count)
+    budget = route_query_budget(request.url.path)
+    if counter.count > budget:
+        metrics.incr("db.query_budget_exceeded")
+        route = f"{request.method} {request.url.path}"
+        print(f"{route} ran {counter.count} queries, over its budget of {budget}")
+        if settings.DB_QUERY_BUDGET_STRICT:
+            return JSONResponse(
+                status_code=500,
+                content={"detail": f"{route} ran {counter.count} queries, over its budget of {budget}"},
+                headers={QUERY_COUNT_HEADER: str(counter.count)},
+            )
+    response.headers[QUERY_COUNT_HEADER] = str(counter.count)
+    return response
@@ -1,12 +1,41 @@
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from app.core.config import get_settings
+from app.db.pool import TimedAsyncQueuePool, TimedQueuePool, instrument_pool
+from app.db.query_budget import count_queries
 
 settings = get_settings()
 
 # Create engine using the SQLALCHEMY_DATABASE_URI property which handles both environments
 engine = create_engine(
     settings.SQLALCHEMY_DATABASE_URI,
-    pool_pre_ping=True,
+    poolclass=TimedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_logging_name="sync",
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+instrument_pool(engine.pool, "sync")
+count_queries(engine)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async engine (asyncpg) for API endpoints; the sync engine above stays for
+# migrations, scripts, the job worker and code run in the blocking pool
+async_engine = create_async_engine(
+    settings.SQLALCHEMY_ASYNC_DATABASE_URI,
+    poolclass=TimedAsyncQueuePool,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_logging_name="async",
+)
+instrument_pool(async_engine.sync_engine.pool, "async")
+count_queries(async_engine.sync_engine)
+# expire_on_commit=False: attributes stay loaded after commit, since an expired
+# attribute can't be lazy-loaded outside an await
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
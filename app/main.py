@@ -1,18 +1,61 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.core.config import get_settings
 from app.api.v1.api import api_router
+from app.db.pool import db_route_middleware
+from app.db.query_budget import query_budget_middleware
+from app.db.session import async_engine
+from app.utils.http import start_http_client, close_http_client
+from app.utils.llm import start_openai_client, close_openai_client
+from app.utils.executor import get_blocking_executor, shutdown_blocking_executor, run_blocking
+from app.utils.circuit_breaker import CircuitOpen
+from app.utils.deadline import DeadlineExceeded, deadline_middleware
+from app.utils.limiter import UpstreamSaturated
+from app.services.browser_pool import browser_pool
+from app.services.llm_ledger import ledger_flush_loop
 
 settings = get_settings()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await start_http_client()
+    await start_openai_client()
+    get_blocking_executor()
+    ledger_stop = asyncio.Event()
+    ledger_task = asyncio.create_task(ledger_flush_loop(ledger_stop))
+    worker_stop, worker_task = None, None
+    if settings.RUN_WORKER_IN_PROCESS:
+        from app.worker import run_worker
+        worker_stop = asyncio.Event()
+        worker_task = asyncio.create_task(run_worker(worker_stop))
+    yield
+    if worker_task:
+        worker_stop.set()
+        await worker_task
+    ledger_stop.set()
+    await ledger_task
+    await run_blocking(browser_pool.close)
+    await close_http_client()
+    await close_openai_client()
+    await async_engine.dispose()
+    shutdown_blocking_executor()
+
 app = FastAPI(
   title=settings.PROJECT_NAME, 
   version=settings.VERSION, 
   openapi_url=f"{settings.API_V1_STR}/openapi.json",
+  lifespan=lifespan,
 )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+app.middleware("http")(deadline_middleware)
+app.middleware("http")(db_route_middleware)
+app.middleware("http")(query_budget_middleware)
+
 app.add_middleware(
   CORSMiddleware,
   allow_origins=["*"],
@@ -21,6 +64,26 @@ app.add_middleware(
   allow_headers=["*"],
 )
 
+@app.exception_handler(UpstreamSaturated)
+async def upstream_saturated_handler(request: Request, exc: UpstreamSaturated):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Upstream {exc.upstream} is busy, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(CircuitOpen)
+async def circuit_open_handler(request: Request, exc: CircuitOpen):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": f"Upstream {exc.upstream} is unavailable, please retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded):
+    return JSONResponse(status_code=504, content={"detail": "Request deadline exceeded"})
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Focus Read API"} 
\ No newline at end of file
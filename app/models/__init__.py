@@ -3,3 +3,9 @@ from app.models.book_progress import BookProgress
 from app.models.reading_session import ReadingSession
 from app.models.table_of_contents import TableOfContents
 from app.models.notes import Notes
+from app.models.book import Book
+from app.models.job import Job
+from app.models.table_of_contents_failure import TableOfContentsFailure
+from app.models.quiz import Quiz, QuizView
+from app.models.llm_call import LLMCall
+from app.models.lease import Lease
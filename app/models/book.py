@@ -0,0 +1,18 @@
+from sqlalchemy import Column, String, JSON, DateTime
+from datetime import datetime
+
+from app.models.base import Base
+
+class Book(Base):
+    """Local catalog of Google Books volumes, keyed by volume ID."""
+    __tablename__ = "books"
+
+    id = Column(String, primary_key=True)  # Google Books volume ID
+    title = Column(String, nullable=False)
+    authors = Column(JSON, nullable=True)
+    volume_info = Column(JSON, nullable=False)  # `volumeInfo` as returned by _parse_volume_info
+    fetched_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_dict(self) -> dict:
+        """Same shape as services.book._parse_volume_info"""
+        return {"id": self.id, "volumeInfo": self.volume_info}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, ForeignKey, String, Enum as SQLEnum, JSON
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index, String, UniqueConstraint, Enum as SQLEnum, JSON
 from sqlalchemy.orm import relationship
 from enum import Enum
 
@@ -11,8 +11,8 @@ class BookProgressStatus(str, Enum):
 class BookProgress(Base):
   __tablename__ = "book_progress"
 
-  id = Column(Integer, primary_key=True, index=True)
-  book_id = Column(String, index=True, nullable=False)
+  id = Column(Integer, primary_key=True)
+  book_id = Column(String, nullable=False)
   user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
   title = Column(String, nullable=False)
   author = Column(String)
@@ -26,6 +26,12 @@ class BookProgress(Base):
     # Relationship
   user = relationship("User", back_populates="book_progresses")
 
+  __table_args__ = (
+    # One progress row per user and book; also serves lookups by (user_id, book_id)
+    UniqueConstraint("user_id", "book_id", name="uq_book_progress_user_book"),
+    Index("ix_book_progress_user_status", "user_id", "status"),
+  )
+
   def update_progress(self) -> None:
     """Update progress percentage and status based on current chapter"""
     if self.total_chapters > 0:
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, String, JSON, DateTime, Index, Enum as SQLEnum, text
+from datetime import datetime
+from enum import Enum
+
+from app.models.base import Base
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(Base):
+    """Background job claimed by workers with SELECT ... FOR UPDATE SKIP LOCKED."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    dedupe_key = Column(String, nullable=True)  # At most one queued/running job per key
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(SQLEnum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    last_error = Column(String, nullable=True)
+    result = Column(JSON, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+        Index(
+            "ix_jobs_active_dedupe_key",
+            "dedupe_key",
+            unique=True,
+            postgresql_where=text("status IN ('QUEUED', 'RUNNING')"),
+        ),
+    )
@@ -0,0 +1,10 @@
+from sqlalchemy import Column, String, DateTime
+from app.models.base import Base
+
+class Lease(Base):
+    """Cross-process lock held as a row; see app.db.locks.try_lease."""
+    __tablename__ = "leases"
+
+    key = Column(String, primary_key=True)
+    holder = Column(String, nullable=False)  # Random per claim, so only the claimer releases it
+    expires_at = Column(DateTime, nullable=False)  # After this the lease can be taken over
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Boolean, Float, DateTime, Index
+from datetime import datetime
+
+from app.models.base import Base
+
+class LLMCall(Base):
+    """Ledger of LLM calls (and cache hits that avoided one) for latency and spend accounting."""
+    __tablename__ = "llm_calls"
+
+    id = Column(Integer, primary_key=True)
+    endpoint = Column(String, nullable=False)  # Caller label, e.g. "quiz.generate" or "job.quiz.pregenerate"
+    model = Column(String, nullable=True)  # None for cache hits
+    outcome = Column(String, nullable=False)  # success | timeout | error | cache_hit
+    cache_hit = Column(Boolean, nullable=False, default=False)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    latency_ms = Column(Float, nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_llm_calls_created_at", "created_at"),
+        Index("ix_llm_calls_endpoint_created_at", "endpoint", "created_at"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, text
 from app.models.base import Base
 from datetime import datetime
 from sqlalchemy.orm import relationship
@@ -6,11 +6,16 @@ from sqlalchemy.orm import relationship
 class Notes(Base):
     __tablename__ = "notes"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     reading_session_id = Column(Integer, ForeignKey("reading_sessions.id"), nullable=False)
     content = Column(String, nullable=False) 
     created_at = Column(DateTime, default=datetime.now)
 
     user = relationship("User", back_populates="notes")
-    reading_session = relationship("ReadingSession", back_populates="notes") 
\ No newline at end of file
+    reading_session = relationship("ReadingSession", back_populates="notes")
+
+    __table_args__ = (
+        # Notes of a session for a user, newest first, without a sort step
+        Index("ix_notes_session_user_created", "reading_session_id", "user_id", text("created_at DESC")),
+    ) 
\ No newline at end of file
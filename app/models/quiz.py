@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, JSON, DateTime, ForeignKey, UniqueConstraint
+from datetime import datetime
+
+from app.models.base import Base
+
+class Quiz(Base):
+    """Generated question pool cached per (book, author, chapter, prompt version)."""
+    __tablename__ = "quizzes"
+
+    id = Column(Integer, primary_key=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)
+    book_name = Column(String, nullable=False)
+    author_name = Column(String, nullable=False)
+    chapter_name = Column(String, nullable=False)
+    prompt_version = Column(String, nullable=False)
+    book_id = Column(String, index=True, nullable=True)  # Google Books volume ID, when known
+    chapter_number = Column(Integer, nullable=True)  # TOC chapter number, when known
+    questions = Column(JSON, nullable=False)
+    model = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class QuizView(Base):
+    """Which questions of a quiz's pool a user has been served, to avoid repeats."""
+    __tablename__ = "quiz_views"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    quiz_id = Column(Integer, ForeignKey("quizzes.id", ondelete="CASCADE"), nullable=False)
+    seen_indexes = Column(JSON, nullable=False, default=list)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "quiz_id", name="uq_quiz_views_user_quiz"),
+    )
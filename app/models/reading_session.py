@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from enum import Enum
@@ -22,8 +22,8 @@ class IntervalStatus(str, Enum):
 class Interval(Base):
   __tablename__ = "intervals"
 
-  id = Column(Integer, primary_key=True, index=True)
-  session_id = Column(Integer, ForeignKey("reading_sessions.id"))
+  id = Column(Integer, primary_key=True)
+  session_id = Column(Integer, ForeignKey("reading_sessions.id"), index=True)
   type = Column(SQLEnum(IntervalType))
   status = Column(SQLEnum(IntervalStatus))
   remaining_time = Column(Integer)  # in seconds
@@ -35,9 +35,9 @@ class Interval(Base):
 class ReadingSession(Base):
   __tablename__ = "reading_sessions"
 
-  id = Column(Integer, primary_key=True, index=True)
+  id = Column(Integer, primary_key=True)
   user_id = Column(Integer, ForeignKey("users.id"))
-  book_id = Column(String, index=True)
+  book_id = Column(String)
   chapter_number = Column(Integer)
   chapter_title = Column(String)
   chapter_type = Column(String)
@@ -46,6 +46,14 @@ class ReadingSession(Base):
   completed_at = Column(DateTime, nullable=True)
   intervals_count = Column(Integer, default=0)
 
-  intervals = relationship("Interval", back_populates="session")
+  # No implicit lazy loads: every query that returns intervals picks its loader
+  # (selectinload for lists, joinedload for one session) or the access raises
+  intervals = relationship("Interval", back_populates="session", order_by="Interval.id", lazy="raise")
   notes = relationship("Notes", back_populates="reading_session")
-  user = relationship("User", back_populates="reading_sessions") 
\ No newline at end of file
+  user = relationship("User", back_populates="reading_sessions")
+
+  __table_args__ = (
+    Index("ix_reading_sessions_user_status", "user_id", "status"),
+    # Book notes join sessions by book and sort by chapter; id is included for index-only scans
+    Index("ix_reading_sessions_book_chapter", "book_id", "chapter_number", postgresql_include=["id"]),
+  ) 
\ No newline at end of file
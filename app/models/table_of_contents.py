@@ -1,9 +1,10 @@
-from sqlalchemy import Column, Integer, String, JSON
+from sqlalchemy import Column, Integer, String, JSON, Text
 from app.models.base import Base
 
 class TableOfContents(Base):
     __tablename__ = "table_of_contents"
 
-    id = Column(Integer, primary_key=True, index=True)
-    book_id = Column(String, index=True, nullable=False)
-    content = Column(JSON, nullable=False)  # Store the TOC structure as JSON 
\ No newline at end of file
+    id = Column(Integer, primary_key=True)
+    book_id = Column(String, unique=True, index=True, nullable=False)
+    content = Column(JSON, nullable=False)  # Store the TOC structure as JSON
+    raw_text = Column(Text, nullable=True)  # Scraped text, kept so TOCs can be reparsed 
\ No newline at end of file
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from app.models.base import Base
+
+class TableOfContentsFailure(Base):
+    """Negative cache: books whose TOC scrape failed and when to try again."""
+    __tablename__ = "table_of_contents_failures"
+
+    book_id = Column(String, primary_key=True)
+    reason = Column(String, nullable=False)  # services.book.TocFailureReason value
+    message = Column(String, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+    last_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    next_retry_at = Column(DateTime, nullable=False, index=True)
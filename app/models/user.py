@@ -5,7 +5,7 @@ from app.models.base import Base
 class User(Base):
   __tablename__ = "users"
 
-  id = Column(Integer, primary_key=True, index=True)
+  id = Column(Integer, primary_key=True)
   email = Column(String, unique=True, index=True)
   username = Column(String, unique=True, index=True)
   is_active = Column(Boolean, default=True)
@@ -0,0 +1,16 @@
+"""
+Reparse stored tables of contents with the current parser.
+
+Run with `python -m app.reparse_tocs` after changing services/toc_parser.py.
+Only TOCs stored with their raw scraped text can be reparsed.
+"""
+import time
+
+from app.db.session import SessionLocal
+from app.services.toc import reparse_stored_tocs
+
+if __name__ == "__main__":
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        count = reparse_stored_tocs(db)
+    print(f"Reparsed {count} tables of contents in {time.perf_counter() - started:.1f}s")
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, HttpUrl
 from typing import Optional, List, Dict
+from datetime import datetime
+from pydantic import Field
 
 class IndustryIdentifier(BaseModel):
     type: str
@@ -42,9 +44,26 @@ class BookDetailResponse(BookBase):
     pass
 
 class ToCEntry(BaseModel):
-    type: str  # "section", "chapter", "intro", or "other"
+    type: str  # "section", "chapter", "subsection", "intro", or "other"
     title: str
     page: Optional[int] = None
+    number: Optional[int] = None  # Chapter number, for chapters
+    section_number: Optional[str] = None  # e.g. "3.2", for subsections
+    level: Optional[int] = None  # 0 section, 1 chapter/front/back matter, 2 subsection
 
 class ToCResponse(BaseModel):
-    toc: List[ToCEntry] 
\ No newline at end of file
+    toc: List[ToCEntry]
+
+class ToCBatchRequest(BaseModel):
+    book_ids: List[str] = Field(..., min_length=1, max_length=100)
+
+class ToCBatchItem(BaseModel):
+    status: str  # "ready", "pending", "queued" or "failed"
+    toc: Optional[List[ToCEntry]] = None
+    job_id: Optional[int] = None
+    status_url: Optional[str] = None
+    reason: Optional[str] = None
+    next_retry_at: Optional[datetime] = None
+
+class ToCBatchResponse(BaseModel):
+    results: Dict[str, ToCBatchItem]
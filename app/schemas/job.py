@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from datetime import datetime
+from typing import Optional, Any, Dict, List
+from enum import Enum
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+class Job(BaseModel):
+    id: int
+    kind: str
+    status: JobStatus
+    attempts: int
+    max_attempts: int
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    run_after: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+class JobAccepted(BaseModel):
+    """Returned with 202 when the requested resource is being built in the background"""
+    status: str = "pending"
+    job_id: int
+    status_url: str
+    toc: List[Any] = []
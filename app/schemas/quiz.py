@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 
 class QuizQuestion(BaseModel):
 	question: str
@@ -10,6 +10,36 @@ class QuizRequest(BaseModel):
 	book_name: str
 	chapter_name: str
 	author_name: str
+	book_id: Optional[str] = None  # Google Books volume ID, links the cached quiz to the book
+	chapter_number: Optional[int] = None  # Chapter number from the book's TOC
+	no_repeat: bool = False  # Avoid questions this user has already been served
 
 class QuizResponse(BaseModel):
-  questions: List[QuizQuestion] 
\ No newline at end of file
+  questions: List[QuizQuestion]
+
+class QuizBatchChapter(BaseModel):
+	chapter_name: str
+	chapter_number: Optional[int] = None
+
+class QuizBatchRequest(BaseModel):
+	book_name: str
+	author_name: str
+	book_id: Optional[str] = None
+	chapters: List[QuizBatchChapter] = Field(min_length=1)
+
+class QuizBatchItem(BaseModel):
+	chapter_name: str
+	chapter_number: Optional[int] = None
+	status: str  # ready | failed
+	cached: bool = False
+	questions: List[QuizQuestion] = []
+	error: Optional[str] = None
+
+class QuizBatchResponse(BaseModel):
+	results: List[QuizBatchItem]
+
+class QuizPregenerationStatus(BaseModel):
+	book_id: str
+	chapters: int  # Chapters in the book's stored TOC
+	ready: int  # Chapters with a cached quiz
+	pending_jobs: int  # Pre-generation jobs still queued or running
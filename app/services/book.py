@@ -1,20 +1,27 @@
-import requests
-from typing import Dict, Any, Optional
-from openai import OpenAI
+from typing import Dict, Any, Optional, Union
+from dataclasses import dataclass
+from enum import Enum
 from app.core.config import get_settings
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-import re
-import os
+import time
+from urllib.parse import urljoin
+from lxml import html as lxml_html
+
+from app.services.browser_pool import browser_pool
+from app.services.toc_parser import parse_toc
+from app.utils.executor import run_blocking
+from app.utils.metrics import metrics
+
+from app.utils.cache import TTLCache, cached, get_shared_backend
+from app.utils.circuit_breaker import CircuitOpen, barnes_noble_breaker, google_books_breaker
+from app.utils.deadline import DeadlineExceeded, bounded
+from app.utils.http import get_http_client
+from app.utils.limiter import UpstreamSaturated, google_books_limiter, barnes_noble_limiter
 
 settings = get_settings()
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
 def _parse_volume_info(volume: Dict[str, Any]) -> Dict[str, Any]:
   """Helper function to parse volume information from Google Books API response"""
@@ -40,8 +47,35 @@ def _parse_volume_info(volume: Dict[str, Any]) -> Dict[str, Any]:
 		}
 }
 
-def search_books(query: str, lang: Optional[str] = None, max_results: int = 10):
-	"""Search for books using the Google Books API"""
+# Upstream page sizes we actually request; smaller requests are sliced from these
+# so "max_results=5" and "max_results=10" share one cache entry.
+MAX_RESULTS_BUCKETS = (10, 20, 40)
+
+search_cache = TTLCache(
+	"books.search",
+	max_entries=settings.BOOKS_CACHE_MAX_ENTRIES,
+	ttl=settings.BOOKS_SEARCH_CACHE_TTL_SECONDS,
+	stale_ttl=settings.BOOKS_CACHE_STALE_SECONDS,
+	backend=get_shared_backend("books.search"),
+)
+
+details_cache = TTLCache(
+	"books.details",
+	max_entries=settings.BOOKS_CACHE_MAX_ENTRIES,
+	ttl=settings.BOOKS_DETAILS_CACHE_TTL_SECONDS,
+	stale_ttl=settings.BOOKS_CACHE_STALE_SECONDS,
+	backend=get_shared_backend("books.details"),
+)
+
+def normalize_search_query(query: str, lang: Optional[str], max_results: int):
+	"""Normalize search parameters so equivalent queries hit the same cache entry"""
+	query = " ".join(query.split()).lower()
+	lang = lang.strip().lower() if lang and lang.strip() else None
+	bucket = next((b for b in MAX_RESULTS_BUCKETS if max_results <= b), MAX_RESULTS_BUCKETS[-1])
+	return query, lang, bucket
+
+@cached(search_cache, key_func=lambda query, lang, max_results: f"{query}|{lang or ''}|{max_results}")
+async def _search_volumes(query: str, lang: Optional[str], max_results: int):
 	url = "https://www.googleapis.com/books/v1/volumes"
 	params = {
 		"q": query,
@@ -49,9 +83,12 @@ def search_books(query: str, lang: Optional[str] = None, max_results: int = 10):
 		"langRestrict": lang,
 		"maxResults": max_results
 	}
+	# httpx sends None values as empty strings, so drop unset params
+	params = {k: v for k, v in params.items() if v is not None}
 	
-	response = requests.get(url, params=params)
-	response.raise_for_status()
+	async with google_books_breaker.guard(), google_books_limiter.slot():
+		response = await get_http_client().get(url, params=params, timeout=bounded(settings.HTTP_TIMEOUT_SECONDS))
+		response.raise_for_status()
 	data = response.json()
 	
 	return {
@@ -59,69 +96,68 @@ def search_books(query: str, lang: Optional[str] = None, max_results: int = 10):
 		"totalItems": data.get("totalItems", 0)
 	}
 
-def get_book_details(book_id: str):
+async def search_books(query: str, lang: Optional[str] = None, max_results: int = 10):
+	"""Search for books using the Google Books API"""
+	result = await _search_volumes(*normalize_search_query(query, lang, max_results))
+	return {
+		"books": result["books"][:max_results],
+		"totalItems": result["totalItems"]
+	}
+
+@cached(details_cache, key_func=lambda book_id: book_id.strip())
+async def get_book_details(book_id: str):
 	"""Get detailed information about a specific book"""
-	url = f"https://www.googleapis.com/books/v1/volumes/{book_id}"
-	params = {"key": settings.GOOGLE_BOOKS_API_KEY}
+	url = f"https://www.googleapis.com/books/v1/volumes/{book_id.strip()}"
+	params = {"key": settings.GOOGLE_BOOKS_API_KEY} if settings.GOOGLE_BOOKS_API_KEY else {}
 	
-	response = requests.get(url, params=params)
-	response.raise_for_status()
+	async with google_books_breaker.guard(), google_books_limiter.slot():
+		response = await get_http_client().get(url, params=params, timeout=bounded(settings.HTTP_TIMEOUT_SECONDS))
+		response.raise_for_status()
 	return _parse_volume_info(response.json())
 
 
 def parse_toc_to_json(toc_text):
-	lines = toc_text.split("\n")
-	toc = []
-
-	for line in lines:
-			# Determine type and extract details
-			if re.match(r"^Part\s\d+", line, re.IGNORECASE):  # Section title
-					toc.append({"type": "section", "title": line.strip(), "page": None})
-			elif re.match(r"^\d+", line):  # Chapter title
-					match = re.match(r"^(\d+)\s+(.*?)\s+(\d+)$", line)
-					if match:
-							toc.append({
-									"type": "chapter",
-									"number": int(match.group(1)),
-									"title": match.group(2).strip(),
-									"page": int(match.group(3))
-							})
-			elif "Timeline" in line or "Introduction" in line:  # Intro
-					toc.append({"type": "intro", "title": line.strip(), "page": None})
-			else:  # Other
-					toc.append({"type": "other", "title": line.strip(), "page": None})
-
-	return {"toc": toc}
-
-
-def scrape_toc_from_bn(book_title, author_name):
-	chrome_options = Options()
-	chrome_options.add_argument("--headless") 
-	chrome_options.add_argument("--no-sandbox")  
-	chrome_options.add_argument("--disable-dev-shm-usage")  
-	chrome_options.add_argument("--disable-gpu")  
-	chrome_options.add_argument("--start-maximized")  
-	chrome_options.add_argument("--window-size=1920,1080")
-	chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36") 
-
-
-	if 'GOOGLE_CHROME_BIN' in os.environ:
-		# Heroku environment
-		chrome_options.binary_location = os.environ.get('GOOGLE_CHROME_BIN')
-		service = Service(
-			executable_path=os.environ.get('CHROMEDRIVER_PATH')
-		)
-	else:
-		# Local environment
-		service = Service(ChromeDriverManager().install())
+	"""Parse raw TOC text into structured entries; see services.toc_parser"""
+	return {"toc": parse_toc(toc_text)}
 
-	# Set up the Chrome WebDriver
-	driver = webdriver.Chrome(
-		service=service,
-		options=chrome_options
-	)
 
+class TocFailureReason(str, Enum):
+	BOOK_NOT_FOUND = "book_not_found"  # No search result on B&N
+	TOC_NOT_AVAILABLE = "toc_not_available"  # Product page has no TOC tab
+	TOC_EMPTY = "toc_empty"
+	EXTRACTION_FAILED = "extraction_failed"  # Page structure changed or didn't load
+	ERROR = "error"
+
+
+@dataclass
+class TocScrapeFailure:
+	reason: TocFailureReason
+	message: str
+
+
+def scrape_toc_from_bn(book_title, author_name, timeout=None) -> Union[str, TocScrapeFailure]:
+	"""
+	Scrape the table of contents from Barnes & Noble using a pooled browser.
+	Returns the raw TOC text, or a TocScrapeFailure describing why none was found.
+	Raises BrowserPoolSaturated when no browser is free within the acquire timeout.
+	Page loads and waits share `timeout` seconds (BN_SCRAPE_TIMEOUT_SECONDS by default).
+	"""
+	deadline = time.monotonic() + (timeout if timeout is not None else settings.BN_SCRAPE_TIMEOUT_SECONDS)
+	with browser_pool.driver() as driver:
+		return _scrape_toc_with_driver(driver, book_title, author_name, deadline)
+
+
+def _step_timeout(deadline: float) -> float:
+	"""Seconds the next page load or wait may take"""
+	remaining = deadline - time.monotonic()
+	if remaining <= 0:
+		raise TimeoutError("Scrape deadline exceeded")
+	return min(settings.BN_SCRAPE_STEP_TIMEOUT_SECONDS, remaining)
+
+
+def _scrape_toc_with_driver(driver, book_title, author_name, deadline):
 	try:
+		driver.set_page_load_timeout(_step_timeout(deadline))
 		# Step 1: Search for the book on Barnes & Noble
 		search_query = f"{book_title} {author_name}".replace(" ", "+")
 		search_url = f"https://www.barnesandnoble.com/s/{search_query}"
@@ -130,21 +166,25 @@ def scrape_toc_from_bn(book_title, author_name):
 
 		# Step 2: Wait for search results and locate the first book link
 		try:
-			WebDriverWait(driver, 20).until(
+			WebDriverWait(driver, _step_timeout(deadline)).until(
 				EC.presence_of_element_located((By.CLASS_NAME, "pImageLink"))
 			)
 			book_link = driver.find_element(By.CLASS_NAME, "pImageLink")
 			book_url = book_link.get_attribute("href")
 			print(f"✅ Book Page URL found: {book_url}")
 		except Exception as e:
-			return f"❌ Error: Could not find book link on search results. {e}"
+			return TocScrapeFailure(TocFailureReason.BOOK_NOT_FOUND, f"Could not find book link on search results. {e}")
 		
 		# Step 3: Navigate to the book detail page
+		driver.set_page_load_timeout(_step_timeout(deadline))
 		driver.get(book_url)
-		WebDriverWait(driver, 20).until(
-			EC.presence_of_element_located((By.CSS_SELECTOR, "a[href='#TOC']"))
-		)
-		print("✅ Table of Contents Tab Found")
+		try:
+			WebDriverWait(driver, _step_timeout(deadline)).until(
+				EC.presence_of_element_located((By.CSS_SELECTOR, "a[href='#TOC']"))
+			)
+			print("✅ Table of Contents Tab Found")
+		except Exception as e:
+			return TocScrapeFailure(TocFailureReason.TOC_NOT_AVAILABLE, f"No 'Table of Contents' tab on {book_url}. {e}")
 
 		# Step 4: Click the "Table of Contents" tab
 		try:
@@ -154,7 +194,7 @@ def scrape_toc_from_bn(book_title, author_name):
 			print("✅ Clicked on the 'Table of Contents' tab via JavaScript.")
 			# time.sleep(3)  # Wait for content to load
 		except Exception as e:
-			return f"❌ Error: Could not find or click the 'Table of Contents' tab. {e}"
+			return TocScrapeFailure(TocFailureReason.TOC_NOT_AVAILABLE, f"Could not find or click the 'Table of Contents' tab. {e}")
 		
 
 		# Step 5: Click on the show more button
@@ -163,23 +203,135 @@ def scrape_toc_from_bn(book_title, author_name):
 			driver.execute_script("arguments[0].click();", show_more_button)
 			print("✅ Clicked on the 'Show More' button.")
 		except Exception as e:
-			return f"❌ Error: Could not find or click the 'Show More' button. {e}"
+			return TocScrapeFailure(TocFailureReason.EXTRACTION_FAILED, f"Could not find or click the 'Show More' button. {e}")
 
 
 		# Step 6: Extract the Table of Contents
 		try:
-			WebDriverWait(driver, 20).until(
+			WebDriverWait(driver, _step_timeout(deadline)).until(
 				EC.visibility_of_element_located((By.CSS_SELECTOR, "div.d-sm-block.table-of-contents.centered"))
 			)
 			toc_section = driver.find_element(By.CSS_SELECTOR, "div.d-sm-block.table-of-contents.centered")
 			toc_text = toc_section.text.strip()
-			return toc_text if toc_text else "No Table of Contents found."
+			return toc_text if toc_text else TocScrapeFailure(TocFailureReason.TOC_EMPTY, "No Table of Contents found.")
 		except Exception as e:
-			return f"❌Error: Could not extract the 'Table of Contents'. {e}"
+			return TocScrapeFailure(TocFailureReason.EXTRACTION_FAILED, f"Could not extract the 'Table of Contents'. {e}")
 
 	except Exception as e:
-		return f"Error occurred: {e}"
+		return TocScrapeFailure(TocFailureReason.ERROR, f"Error occurred: {e}")
+
+
+BN_BASE_URL = "https://www.barnesandnoble.com"
+BN_HEADERS = {
+	"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+	"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+	"Accept-Language": "en-US,en;q=0.9",
+}
+BN_BOOK_LINK_XPATH = "//a[contains(concat(' ', normalize-space(@class), ' '), ' pImageLink ')]/@href"
+BN_TOC_XPATH = "//div[contains(concat(' ', normalize-space(@class), ' '), ' table-of-contents ')]"
+BLOCK_TAGS = {"p", "div", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+def _element_lines(element) -> str:
+	"""Text of an element with <br> and block boundaries turned into newlines"""
+	for child in element.iter():
+		if child.tag == "br":
+			child.tail = "\n" + (child.tail or "")
+		elif child.tag in BLOCK_TAGS and child is not element:
+			child.tail = "\n" + (child.tail or "")
+	lines = (line.strip() for line in element.text_content().split("\n"))
+	return "\n".join(line for line in lines if line)
 
-	finally:
-		# Close the WebDriver
-		driver.quit()
+
+def _extract_book_url(search_html: str) -> Optional[str]:
+	links = lxml_html.fromstring(search_html).xpath(BN_BOOK_LINK_XPATH)
+	return urljoin(BN_BASE_URL, links[0]) if links else None
+
+
+def _extract_toc_text(product_html: str) -> Optional[str]:
+	sections = lxml_html.fromstring(product_html).xpath(BN_TOC_XPATH)
+	for section in sections:
+		text = _element_lines(section)
+		if text:
+			return text
+	return None
+
+
+async def _bn_get(client, url):
+	"""GET a B&N page; 5xx and 429 responses count against the B&N breaker"""
+	async with barnes_noble_breaker.guard(), barnes_noble_limiter.slot():
+		response = await client.get(
+			url,
+			headers=BN_HEADERS,
+			follow_redirects=True,
+			timeout=bounded(settings.HTTP_TIMEOUT_SECONDS)
+		)
+		if response.status_code >= 500 or response.status_code == 429:
+			response.raise_for_status()
+	return response
+
+
+async def fetch_toc_from_bn_http(book_title, author_name) -> Optional[str]:
+	"""
+	Browser-free fast path: fetch the B&N search and product pages over plain
+	HTTP and pull the TOC block out with XPath. Returns None whenever the page
+	doesn't contain what we need (blocked, JS-only render, markup change) so the
+	caller can fall back to Selenium.
+	"""
+	client = get_http_client()
+	search_query = f"{book_title} {author_name}".replace(" ", "+")
+	response = await _bn_get(client, f"{BN_BASE_URL}/s/{search_query}")
+	if response.status_code != 200:
+		return None
+
+	# A single exact match redirects straight to the product page
+	toc_text = await run_blocking(_extract_toc_text, response.text)
+	if toc_text:
+		return toc_text
+
+	book_url = await run_blocking(_extract_book_url, response.text)
+	if not book_url:
+		return None
+
+	response = await _bn_get(client, book_url)
+	if response.status_code != 200:
+		return None
+	return await run_blocking(_extract_toc_text, response.text)
+
+
+async def fetch_toc_text(book_title, author_name) -> Union[str, TocScrapeFailure]:
+	"""
+	Get raw TOC text for a book, trying the HTTP + lxml tier first and the
+	Selenium tier only when it comes back empty-handed.
+	"""
+	if settings.TOC_HTTP_FAST_PATH_ENABLED:
+		started = time.perf_counter()
+		try:
+			toc_text = await fetch_toc_from_bn_http(book_title, author_name)
+		except (UpstreamSaturated, CircuitOpen, DeadlineExceeded):
+			raise
+		except Exception as e:
+			print(f"HTTP TOC fast path failed: {e}")
+			toc_text = None
+		metrics.observe("toc.tier.http.seconds", time.perf_counter() - started)
+		if toc_text:
+			metrics.incr("toc.tier.http.success")
+			return toc_text
+		metrics.incr("toc.tier.http.miss")
+
+	started = time.perf_counter()
+	# The deadline is a context variable, so resolve it here rather than in the scraper's thread
+	timeout = bounded(settings.BN_SCRAPE_TIMEOUT_SECONDS)
+	async with barnes_noble_limiter.slot():
+		result = await barnes_noble_breaker.call(
+			run_blocking,
+			scrape_toc_from_bn,
+			book_title=book_title,
+			author_name=author_name,
+			timeout=timeout,
+			# Only unexpected errors (page loads timing out, browser crashes) say B&N is unhealthy
+			is_failure=lambda result: isinstance(result, TocScrapeFailure) and result.reason == TocFailureReason.ERROR,
+		)
+	metrics.observe("toc.tier.browser.seconds", time.perf_counter() - started)
+	metrics.incr("toc.tier.browser.failure" if isinstance(result, TocScrapeFailure) else "toc.tier.browser.success")
+	return result
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_settings
+from app.models.book import Book
+from app.services.book import get_book_details
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+def _is_fresh(book: Book) -> bool:
+	return book.fetched_at >= datetime.utcnow() - timedelta(days=settings.BOOK_CATALOG_REFRESH_DAYS)
+
+async def get_catalog_book(db: AsyncSession, book_id: str) -> Optional[Book]:
+	return await db.get(Book, book_id)
+
+async def save_catalog_book(db: AsyncSession, book_data: Dict[str, Any]) -> None:
+	"""Insert or refresh a catalog row from a _parse_volume_info result"""
+	volume_info = book_data["volumeInfo"]
+	values = {
+		"id": book_data["id"],
+		"title": volume_info["title"],
+		"authors": volume_info.get("authors", []),
+		"volume_info": volume_info,
+		"fetched_at": datetime.utcnow(),
+	}
+	stmt = insert(Book).values(**values)
+	stmt = stmt.on_conflict_do_update(
+		index_elements=[Book.id],
+		set_={k: stmt.excluded[k] for k in values if k != "id"},
+	)
+	await db.execute(stmt)
+	await db.commit()
+
+async def get_or_fetch_book(db: AsyncSession, book_id: str) -> Dict[str, Any]:
+	"""
+	Return book details from the local catalog, fetching from Google Books
+	only on first lookup or once the row is older than BOOK_CATALOG_REFRESH_DAYS.
+	A stale row is still served if the refresh fails.
+	"""
+	book = await get_catalog_book(db, book_id)
+	if book and _is_fresh(book):
+		metrics.incr("catalog.hit")
+		return book.to_dict()
+
+	# Return the connection to the pool for the Google Books call; `book` stays
+	# readable detached and the write below checks out a fresh connection
+	await db.close()
+	try:
+		book_data = await get_book_details(book_id)
+	except Exception:
+		if book:
+			metrics.incr("catalog.stale_served")
+			return book.to_dict()
+		raise
+
+	metrics.incr("catalog.refresh" if book else "catalog.miss")
+	await save_catalog_book(db, book_data)
+	return book_data
@@ -1,21 +1,36 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.book_progress import BookProgress, BookProgressStatus
+from app.models.book import Book
 
 class BookProgressService:
 	@staticmethod
 	async def get_or_create_progress(
-		db: Session, 
+		db: AsyncSession, 
 		user_id: int,
 		book_data: dict,
 		total_chapters: int
 	) -> BookProgress:
-			progress = db.query(BookProgress).filter(
+			progress = await db.scalar(select(BookProgress).where(
 					BookProgress.user_id == user_id,
 					BookProgress.book_id == book_data["book_id"]
-			).first()
+			))
 			
 			if not progress:
+					# Prefer the catalog copy over client-supplied details when we have it
+					catalog_book = await db.get(Book, book_data["book_id"])
+					if catalog_book:
+							volume_info = catalog_book.volume_info
+							authors = volume_info.get("authors") or []
+							book_data = {
+									**book_data,
+									"title": volume_info["title"],
+									"author": authors[0] if authors else book_data.get("author"),
+									"cover_image": (volume_info.get("imageLinks") or {}).get("thumbnail") or book_data.get("cover_image"),
+							}
+
 					progress = BookProgress(
 							user_id=user_id,
 							book_id=book_data["book_id"],
@@ -27,33 +42,42 @@ class BookProgressService:
 							book_metadata=book_data.get("metadata")
 					)
 					db.add(progress)
-					db.commit()
-					db.refresh(progress)
+					try:
+							await db.commit()
+					except IntegrityError:
+							# A concurrent request created it first (uq_book_progress_user_book)
+							await db.rollback()
+							return await db.scalar(select(BookProgress).where(
+									BookProgress.user_id == user_id,
+									BookProgress.book_id == book_data["book_id"]
+							))
+					await db.refresh(progress)
 			
 			return progress
 
 	@staticmethod
-	async def update_progress(db: Session, user_id: int, book_id: str, chapter_number: int) -> BookProgress:
+	async def update_progress(db: AsyncSession, user_id: int, book_id: str, chapter_number: int) -> BookProgress:
 		# Get existing progress or create new
-		progress = db.query(BookProgress).filter(
+		progress = await db.scalar(select(BookProgress).where(
 			BookProgress.user_id == user_id,
 			BookProgress.book_id == book_id
-		).first()
+		))
 
 		if progress:
 			progress.current_chapter = max(progress.current_chapter, chapter_number)
 			progress.update_progress()
-			db.commit()
-			db.refresh(progress)
+			await db.commit()
+			await db.refresh(progress)
 		
 		return progress
 
 	@staticmethod
-	async def get_user_reading_books(db: Session, user_id: int, status: BookProgressStatus) -> List[BookProgress]:
+	async def get_user_reading_books(db: AsyncSession, user_id: int, status: BookProgressStatus) -> List[BookProgress]:
 		"""
 		Get all books with the specified status for a user
 		"""
-		return db.query(BookProgress).filter(
+		result = await db.scalars(select(BookProgress).where(
 			BookProgress.user_id == user_id,
 			BookProgress.status == status
-		).all() 
\ No newline at end of file
+		))
+		return list(result) 
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Iterator, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chrome.options import Options
+from webdriver_manager.chrome import ChromeDriverManager
+
+from app.core.config import get_settings
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+
+class BrowserPoolSaturated(Exception):
+    """Raised when no browser frees up within the acquire timeout."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Browser pool saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+@lru_cache
+def _local_chromedriver_path() -> str:
+    # Resolve (and download if needed) once per process instead of per scrape
+    return ChromeDriverManager().install()
+
+
+def _create_driver() -> webdriver.Chrome:
+    chrome_options = Options()
+    chrome_options.add_argument("--headless")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+
+    if 'GOOGLE_CHROME_BIN' in os.environ:
+        # Heroku environment
+        chrome_options.binary_location = os.environ.get('GOOGLE_CHROME_BIN')
+        service = Service(
+            executable_path=os.environ.get('CHROMEDRIVER_PATH')
+        )
+    else:
+        # Local environment
+        service = Service(_local_chromedriver_path())
+
+    return webdriver.Chrome(service=service, options=chrome_options)
+
+
+class PooledDriver:
+    def __init__(self, driver: webdriver.Chrome):
+        self.driver = driver
+        self.pages_served = 0
+        self.created_at = time.time()
+
+
+class BrowserPool:
+    """
+    Bounded pool of warm headless Chrome instances.
+
+    At most `size` browsers exist at once. Idle browsers are reused
+    most-recently-used first, reset between uses and recycled after
+    `max_pages` uses or once their JS heap exceeds `max_memory_mb`.
+    """
+
+    def __init__(self, size: int, max_pages: int, max_memory_mb: int, acquire_timeout: float, retry_after: int):
+        self.size = size
+        self.max_pages = max_pages
+        self.max_memory_mb = max_memory_mb
+        self.acquire_timeout = acquire_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(size)
+        self._idle: "queue.LifoQueue[PooledDriver]" = queue.LifoQueue()
+        self._in_use = 0
+        self._lock = threading.Lock()
+
+    def _update_gauges(self) -> None:
+        metrics.gauge("browser_pool.in_use", self._in_use)
+        metrics.gauge("browser_pool.idle", self._idle.qsize())
+
+    def _is_healthy(self, pooled: PooledDriver) -> bool:
+        try:
+            pooled.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _memory_mb(self, pooled: PooledDriver) -> float:
+        try:
+            used = pooled.driver.execute_script(
+                "return performance.memory ? performance.memory.usedJSHeapSize : 0"
+            )
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _quit(self, pooled: PooledDriver, reason: str) -> None:
+        metrics.incr("browser_pool.recycled")
+        metrics.incr(f"browser_pool.recycled.{reason}")
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self) -> PooledDriver:
+        started = time.perf_counter()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            metrics.incr("browser_pool.rejected")
+            raise BrowserPoolSaturated(self.retry_after)
+        metrics.observe("browser_pool.wait_seconds", time.perf_counter() - started)
+
+        try:
+            pooled = None
+            while pooled is None:
+                try:
+                    candidate = self._idle.get_nowait()
+                except queue.Empty:
+                    metrics.incr("browser_pool.created")
+                    pooled = PooledDriver(_create_driver())
+                    break
+                if self._is_healthy(candidate):
+                    pooled = candidate
+                else:
+                    self._quit(candidate, "unhealthy")
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._update_gauges()
+        return pooled
+
+    def release(self, pooled: PooledDriver) -> None:
+        pooled.pages_served += 1
+        try:
+            if pooled.pages_served >= self.max_pages:
+                self._quit(pooled, "max_pages")
+            elif self._memory_mb(pooled) > self.max_memory_mb:
+                self._quit(pooled, "memory")
+            else:
+                try:
+                    # Reset page state so the next scrape starts clean
+                    pooled.driver.delete_all_cookies()
+                    pooled.driver.get("about:blank")
+                    self._idle.put(pooled)
+                except Exception:
+                    self._quit(pooled, "reset_failed")
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self._update_gauges()
+            self._slots.release()
+
+    @contextmanager
+    def driver(self) -> Iterator[webdriver.Chrome]:
+        pooled = self.acquire()
+        try:
+            yield pooled.driver
+        finally:
+            self.release(pooled)
+
+    def warm(self, count: Optional[int] = None) -> None:
+        """Start browsers ahead of the first scrape"""
+        count = min(count if count is not None else self.size, self.size)
+        drivers = [self.acquire() for _ in range(count)]
+        for pooled in drivers:
+            pooled.pages_served -= 1  # Warming isn't a served page
+            self.release(pooled)
+
+    def close(self) -> None:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                pooled.driver.quit()
+            except Exception:
+                pass
+        self._update_gauges()
+
+
+browser_pool = BrowserPool(
+    size=settings.BROWSER_POOL_SIZE,
+    max_pages=settings.BROWSER_MAX_PAGES_PER_DRIVER,
+    max_memory_mb=settings.BROWSER_MAX_MEMORY_MB,
+    acquire_timeout=settings.BROWSER_POOL_ACQUIRE_TIMEOUT_SECONDS,
+    retry_after=settings.BROWSER_POOL_RETRY_AFTER_SECONDS,
+)
@@ -0,0 +1,240 @@
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.models.job import Job, JobStatus
+
+settings = get_settings()
+
+ACTIVE_STATUSES = (JobStatus.QUEUED, JobStatus.RUNNING)
+
+class RetryJob(Exception):
+    """Raised by a handler to reschedule a job without using up an attempt"""
+
+    def __init__(self, delay_seconds: float, reason: str = ""):
+        super().__init__(reason or f"Retry in {delay_seconds}s")
+        self.delay_seconds = delay_seconds
+
+JobHandler = Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]]
+
+# kind -> coroutine taking the job payload and returning an optional result
+HANDLERS: Dict[str, JobHandler] = {}
+
+def job_handler(kind: str):
+    """Register a coroutine as the handler for jobs of `kind`"""
+    def decorator(func: JobHandler) -> JobHandler:
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+def get_active_job(db: Session, dedupe_key: str) -> Optional[Job]:
+    return db.query(Job).filter(
+        Job.dedupe_key == dedupe_key,
+        Job.status.in_(ACTIVE_STATUSES)
+    ).first()
+
+def enqueue_job(
+    db: Session,
+    *,
+    kind: str,
+    payload: Dict[str, Any],
+    dedupe_key: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Queue a job. When `dedupe_key` is given and a queued or running job with the
+    same key exists, that job is returned instead of creating a new one.
+    """
+    if dedupe_key:
+        existing = get_active_job(db, dedupe_key)
+        if existing:
+            return existing
+
+    job = Job(
+        kind=kind,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        status=JobStatus.QUEUED,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=datetime.utcnow(),
+    )
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        # Another request queued the same key between our check and insert
+        db.rollback()
+        return get_active_job(db, dedupe_key)
+    db.refresh(job)
+    return job
+
+async def enqueue_job_async(
+    db: AsyncSession,
+    *,
+    kind: str,
+    payload: Dict[str, Any],
+    dedupe_key: Optional[str] = None,
+    max_attempts: Optional[int] = None,
+) -> int:
+    """
+    enqueue_job for async endpoints; returns the job ID. A single INSERT that
+    yields to an existing queued or running job with the same `dedupe_key`.
+    """
+    now = datetime.utcnow()
+    stmt = insert(Job).values(
+        kind=kind,
+        payload=payload,
+        dedupe_key=dedupe_key,
+        status=JobStatus.QUEUED,
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_after=now,
+        created_at=now,
+    )
+    if dedupe_key:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=[Job.dedupe_key],
+            index_where=text("status IN ('QUEUED', 'RUNNING')")
+        )
+    job_id = await db.scalar(stmt.returning(Job.id))
+    await db.commit()
+    if job_id is None:
+        job_id = await db.scalar(select(Job.id).where(
+            Job.dedupe_key == dedupe_key,
+            Job.status.in_(ACTIVE_STATUSES)
+        ))
+    return job_id
+
+def get_active_jobs(db: Session, dedupe_keys: List[str]) -> Dict[str, Job]:
+    """Queued or running jobs for many dedupe keys in one query"""
+    if not dedupe_keys:
+        return {}
+    jobs = db.query(Job).filter(
+        Job.dedupe_key.in_(dedupe_keys),
+        Job.status.in_(ACTIVE_STATUSES)
+    ).all()
+    return {job.dedupe_key: job for job in jobs}
+
+def enqueue_jobs(db: Session, *, kind: str, payloads_by_key: Dict[str, Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Queue one job per dedupe key in a single INSERT. Keys that already have an
+    active job keep it. Returns dedupe_key -> job ID.
+    """
+    if not payloads_by_key:
+        return {}
+    now = datetime.utcnow()
+    stmt = insert(Job).values([
+        {
+            "kind": kind,
+            "payload": payload,
+            "dedupe_key": key,
+            "status": JobStatus.QUEUED,
+            "attempts": 0,
+            "max_attempts": settings.JOB_MAX_ATTEMPTS,
+            "run_after": now,
+            "created_at": now,
+        }
+        for key, payload in payloads_by_key.items()
+    ]).on_conflict_do_nothing(
+        index_elements=[Job.dedupe_key],
+        index_where=text("status IN ('QUEUED', 'RUNNING')")
+    ).returning(Job.dedupe_key, Job.id)
+    job_ids = {key: job_id for key, job_id in db.execute(stmt).all()}
+    db.commit()
+
+    missing = [key for key in payloads_by_key if key not in job_ids]
+    job_ids.update({key: job.id for key, job in get_active_jobs(db, missing).items()})
+    return job_ids
+
+def claim_job(db: Session) -> Optional[Job]:
+    """
+    Atomically claim the next runnable job. SKIP LOCKED lets many workers poll
+    the same table without blocking on each other's rows.
+    """
+    job = db.query(Job).filter(
+        Job.status == JobStatus.QUEUED,
+        Job.run_after <= datetime.utcnow(),
+        Job.kind.in_(HANDLERS.keys())
+    ).order_by(Job.run_after).with_for_update(skip_locked=True).first()
+
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = JobStatus.RUNNING
+    job.locked_at = datetime.utcnow()
+    job.attempts += 1
+    db.commit()
+    db.refresh(job)
+    return job
+
+def complete_job(db: Session, job_id: int, result: Optional[Dict[str, Any]] = None) -> None:
+    job = db.get(Job, job_id)
+    job.status = JobStatus.SUCCEEDED
+    job.result = result
+    job.finished_at = datetime.utcnow()
+    job.locked_at = None
+    db.commit()
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff between attempts"""
+    seconds = settings.JOB_RETRY_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(seconds, settings.JOB_RETRY_MAX_SECONDS))
+
+def fail_job(db: Session, job_id: int, error: str) -> Job:
+    """Record a failed attempt; requeue with backoff until max_attempts is reached"""
+    job = db.get(Job, job_id)
+    job.last_error = error[:1000]
+    job.locked_at = None
+    if job.attempts < job.max_attempts:
+        job.status = JobStatus.QUEUED
+        job.run_after = datetime.utcnow() + retry_delay(job.attempts)
+    else:
+        job.status = JobStatus.FAILED
+        job.finished_at = datetime.utcnow()
+    db.commit()
+    return job
+
+def defer_job(db: Session, job_id: int, delay_seconds: float, reason: str) -> None:
+    """Put a job back in the queue without counting the attempt (e.g. capacity backpressure)"""
+    job = db.get(Job, job_id)
+    job.status = JobStatus.QUEUED
+    job.attempts = max(job.attempts - 1, 0)
+    job.run_after = datetime.utcnow() + timedelta(seconds=delay_seconds)
+    job.last_error = reason[:1000]
+    job.locked_at = None
+    db.commit()
+
+def requeue_stale_jobs(db: Session) -> int:
+    """Return jobs whose worker died mid-run to the queue"""
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.JOB_LOCK_TIMEOUT_SECONDS)
+    count = db.query(Job).filter(
+        Job.status == JobStatus.RUNNING,
+        Job.locked_at < cutoff
+    ).update({Job.status: JobStatus.QUEUED, Job.locked_at: None}, synchronize_session=False)
+    db.commit()
+    return count
+
+def get_queue_stats(db: Session) -> Dict[str, Any]:
+    """Job counts per kind/status and age of the oldest runnable job"""
+    counts: Dict[str, Dict[str, int]] = {}
+    rows = db.query(Job.kind, Job.status, func.count(Job.id)).filter(
+        Job.status.in_(ACTIVE_STATUSES + (JobStatus.FAILED,))
+    ).group_by(Job.kind, Job.status).all()
+    for kind, status, count in rows:
+        counts.setdefault(kind, {})[status.value] = count
+
+    oldest = db.query(func.min(Job.created_at)).filter(
+        Job.status == JobStatus.QUEUED,
+        Job.run_after <= datetime.utcnow()
+    ).scalar()
+
+    return {
+        "counts": counts,
+        "oldest_queued_age_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+    }
@@ -0,0 +1,194 @@
+"""
+LLM call ledger.
+
+Every OpenAI call (and every cache hit that avoided one) is recorded with its
+caller, model, token usage, latency and outcome. Entries are buffered in
+memory and written in batches by `ledger_flush_loop`, so recording never adds
+a database round trip to the request.
+"""
+import asyncio
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.db.session import SessionLocal
+from app.models.llm_call import LLMCall
+from app.utils.circuit_breaker import openai_breaker
+from app.utils.deadline import CallTimeout, bounded
+from app.utils.executor import run_blocking
+from app.utils.limiter import openai_limiter
+from app.utils.llm import get_openai_client
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+# Caller label for ledger entries; set by endpoints and the job worker
+llm_endpoint: ContextVar[str] = ContextVar("llm_endpoint", default="unknown")
+
+_pending: List[Dict[str, Any]] = []
+_pending_lock = threading.Lock()
+
+def set_llm_endpoint(endpoint: str) -> None:
+    llm_endpoint.set(endpoint)
+
+def record_llm_call(
+    *,
+    outcome: str,
+    model: Optional[str] = None,
+    usage: Any = None,
+    latency_seconds: Optional[float] = None,
+    cache_hit: bool = False,
+) -> None:
+    """Buffer a ledger entry; `usage` is the OpenAI usage object, if any"""
+    if not settings.LLM_LEDGER_ENABLED:
+        return
+    entry = {
+        "endpoint": llm_endpoint.get(),
+        "model": model,
+        "outcome": outcome,
+        "cache_hit": cache_hit,
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "latency_ms": latency_seconds * 1000 if latency_seconds is not None else None,
+        "created_at": datetime.utcnow(),
+    }
+    with _pending_lock:
+        if len(_pending) >= settings.LLM_LEDGER_MAX_BUFFER:
+            metrics.incr("llm_ledger.dropped")
+            return
+        _pending.append(entry)
+
+async def create_chat_completion(timeout: Optional[float] = None, **kwargs) -> Any:
+    """
+    `chat.completions.create` on the shared client, bounded by `timeout` and
+    the request deadline, and recorded in the ledger. Non-streaming calls go
+    through the OpenAI breaker and take a limiter slot; streaming callers hold
+    both for the whole stream themselves and record their own entry once the
+    stream (and its usage chunk) has been consumed.
+    """
+    timeout = bounded(timeout)
+    if not kwargs.get("stream"):
+        async with openai_breaker.guard(), openai_limiter.slot():
+            return await _create_chat_completion(timeout, **kwargs)
+    return await _create_chat_completion(timeout, **kwargs)
+
+async def _create_chat_completion(timeout: Optional[float], **kwargs) -> Any:
+    started = time.perf_counter()
+    model = kwargs.get("model")
+    call = get_openai_client().chat.completions.create(**kwargs)
+    try:
+        completion = await (asyncio.wait_for(call, timeout) if timeout is not None else call)
+    except asyncio.TimeoutError as e:
+        record_llm_call(model=model, outcome="timeout", latency_seconds=time.perf_counter() - started)
+        if timeout is None:
+            raise
+        raise CallTimeout(f"{model} call timed out after {timeout:.1f}s") from e
+    except Exception:
+        record_llm_call(model=model, outcome="error", latency_seconds=time.perf_counter() - started)
+        raise
+    if not kwargs.get("stream"):
+        record_llm_call(
+            model=model,
+            outcome="success",
+            usage=completion.usage,
+            latency_seconds=time.perf_counter() - started
+        )
+    return completion
+
+def flush_ledger(db: Session) -> int:
+    """Write buffered entries in one INSERT; returns how many were written"""
+    with _pending_lock:
+        entries = _pending[:]
+        _pending.clear()
+    if not entries:
+        return 0
+    try:
+        db.bulk_insert_mappings(LLMCall, entries)
+        db.commit()
+    except Exception:
+        db.rollback()
+        metrics.incr("llm_ledger.dropped", len(entries))
+        raise
+    metrics.incr("llm_ledger.written", len(entries))
+    return len(entries)
+
+def _flush_in_new_session() -> int:
+    with SessionLocal() as db:
+        return flush_ledger(db)
+
+async def ledger_flush_loop(stop: asyncio.Event) -> None:
+    """Flush the ledger every LLM_LEDGER_FLUSH_INTERVAL_SECONDS, and once more on stop"""
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.LLM_LEDGER_FLUSH_INTERVAL_SECONDS)
+        except asyncio.TimeoutError:
+            pass
+        try:
+            await run_blocking(_flush_in_new_session)
+        except Exception as e:
+            print(f"LLM ledger flush failed: {e}")
+
+def get_llm_usage(db: Session, days: int = 7) -> Dict[str, Any]:
+    """
+    Ledger aggregates over the last `days`: latency percentiles per endpoint
+    and model, and calls, cache hits and tokens per day per endpoint.
+    """
+    since = datetime.utcnow() - timedelta(days=days)
+
+    latency_rows = db.query(
+        LLMCall.endpoint,
+        LLMCall.model,
+        func.count(LLMCall.id),
+        func.sum(case((LLMCall.outcome == "success", 1), else_=0)),
+        func.percentile_cont(0.5).within_group(LLMCall.latency_ms),
+        func.percentile_cont(0.95).within_group(LLMCall.latency_ms),
+        func.percentile_cont(0.99).within_group(LLMCall.latency_ms),
+    ).filter(
+        LLMCall.created_at >= since,
+        LLMCall.cache_hit.is_(False)
+    ).group_by(LLMCall.endpoint, LLMCall.model).all()
+
+    day = func.date_trunc("day", LLMCall.created_at)
+    daily_rows = db.query(
+        day,
+        LLMCall.endpoint,
+        func.sum(case((LLMCall.cache_hit.is_(False), 1), else_=0)),
+        func.sum(case((LLMCall.cache_hit.is_(True), 1), else_=0)),
+        func.coalesce(func.sum(LLMCall.prompt_tokens), 0),
+        func.coalesce(func.sum(LLMCall.completion_tokens), 0),
+    ).filter(
+        LLMCall.created_at >= since
+    ).group_by(day, LLMCall.endpoint).order_by(day).all()
+
+    return {
+        "since": since,
+        "latency": [
+            {
+                "endpoint": endpoint,
+                "model": model,
+                "calls": calls,
+                "success_rate": successes / calls if calls else None,
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+            }
+            for endpoint, model, calls, successes, p50, p95, p99 in latency_rows
+        ],
+        "daily": [
+            {
+                "day": day_start.date(),
+                "endpoint": endpoint,
+                "calls": calls,
+                "cache_hits": hits,
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+            }
+            for day_start, endpoint, calls, hits, prompt_tokens, completion_tokens in daily_rows
+        ],
+    }
@@ -0,0 +1,917 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_settings
+from app.db.locks import try_lease
+from app.db.session import SessionLocal
+from app.models.job import Job
+from app.models.quiz import Quiz, QuizView
+from app.models.table_of_contents import TableOfContents
+from app.schemas.quiz import QuizQuestion
+from app.services.jobs import ACTIVE_STATUSES, RetryJob, enqueue_jobs, job_handler
+from app.services.llm_ledger import create_chat_completion, record_llm_call
+from app.utils.circuit_breaker import CircuitOpen, openai_breaker
+from app.utils.deadline import CallTimeout, bounded
+from app.utils.executor import run_blocking
+from app.utils.json_stream import JSONArrayItemStream
+from app.utils.limiter import openai_limiter
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+# Bump whenever the prompt or output format changes so old cache entries are ignored
+PROMPT_VERSION = "v2"
+# Questions served per quiz; each chapter stores a pool of QUIZ_POOL_SIZE to sample from
+QUESTIONS_PER_QUIZ = 3
+
+QUIZ_PREGEN_JOB = "quiz.pregenerate"
+
+# Seconds to wait before retrying when a book already has its maximum of pre-generation jobs running
+QUIZ_PREGEN_SLOT_RETRY_SECONDS = 10
+
+def normalize(value: str) -> str:
+    """Case- and whitespace-insensitive form used for cache keys"""
+    return " ".join(value.split()).casefold()
+
+def quiz_cache_key(book_name: str, author_name: str, chapter_name: str, prompt_version: str = PROMPT_VERSION) -> str:
+    raw = "\x1f".join((normalize(book_name), normalize(author_name), normalize(chapter_name), prompt_version))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+QUESTION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "question": {"type": "string"},
+        "options": {"type": "array", "items": {"type": "string"}},
+        "correct_answer": {"type": "integer", "enum": [0, 1, 2]},
+    },
+    "required": ["question", "options", "correct_answer"],
+    "additionalProperties": False,
+}
+
+def _response_format(name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+# Structured outputs: the model is constrained to these shapes, so replies are
+# always JSON; questions are still checked with validate_question
+QUIZ_RESPONSE_FORMAT = _response_format("quiz", {
+    "type": "object",
+    "properties": {"questions": {"type": "array", "items": QUESTION_SCHEMA}},
+    "required": ["questions"],
+    "additionalProperties": False,
+})
+CHAPTERS_RESPONSE_FORMAT = _response_format("chapter_quizzes", {
+    "type": "object",
+    "properties": {
+        "chapters": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "chapter": {"type": "string"},
+                    "questions": {"type": "array", "items": QUESTION_SCHEMA},
+                },
+                "required": ["chapter", "questions"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["chapters"],
+    "additionalProperties": False,
+})
+
+def build_quiz_prompt(
+    book_name: str,
+    author_name: str,
+    chapter_name: str,
+    count: Optional[int] = None,
+    exclude: Optional[List[str]] = None,
+) -> str:
+    count = count or settings.QUIZ_POOL_SIZE
+    prompt = f"""
+        Based on your knowledge of the book "{book_name}" by {author_name}, and the chapter title "{chapter_name}," generate {count} distinct multiple-choice questions that reflect the key concepts likely discussed in this chapter. Cover different concepts rather than rephrasing the same question. Assume the chapter explores ideas related to "{chapter_name}" as part of the book's overarching themes.
+
+        Each question has exactly 3 options, and correct_answer is the index (0-2) of the correct option.
+        """
+    if exclude:
+        asked = "\n".join(f"        - {question}" for question in exclude)
+        prompt += f"""
+        Do not repeat any of these questions:
+{asked}
+        """
+    return prompt
+
+def validate_question(q: dict) -> QuizQuestion:
+    """Check a single generated question; raises ValueError if it's malformed"""
+    # Validate required fields
+    if not all(key in q for key in ["question", "options", "correct_answer"]):
+        raise ValueError("Missing required fields in question")
+
+    # Validate options array length
+    if not isinstance(q["options"], list) or len(q["options"]) != 3:
+        raise ValueError("Options must be an array of 3 strings")
+
+    # Validate correct_answer is in range
+    if not isinstance(q["correct_answer"], int) or q["correct_answer"] not in [0, 1, 2]:
+        raise ValueError("correct_answer must be 0, 1, or 2")
+
+    return QuizQuestion(
+        question=q["question"],
+        options=q["options"],
+        correct_answer=q["correct_answer"]
+    )
+
+def build_chapters_quiz_prompt(
+    book_name: str,
+    author_name: str,
+    chapter_names: List[str],
+    count: Optional[int] = None,
+    counts: Optional[Dict[str, int]] = None,
+    exclude: Optional[Dict[str, List[str]]] = None,
+) -> str:
+    """
+    Prompt for several chapters at once. `counts` overrides the number of
+    questions per chapter and `exclude` lists questions a chapter already has,
+    for retries that only ask for what's missing.
+    """
+    count = count or settings.QUIZ_POOL_SIZE
+    counts = counts or {}
+    exclude = exclude or {}
+    if counts:
+        amount = "the number of distinct multiple-choice questions given for each of the chapters below"
+    else:
+        amount = f"{count} distinct multiple-choice questions for each of the chapters below"
+
+    lines = []
+    for i, name in enumerate(chapter_names, 1):
+        lines.append(f"        {i}. {name}" + (f" ({counts[name]} questions)" if name in counts else ""))
+        if exclude.get(name):
+            lines.append("           Do not repeat any of these questions:")
+            lines.extend(f"           - {question}" for question in exclude[name])
+    chapters = "\n".join(lines)
+    return f"""
+        Based on your knowledge of the book "{book_name}" by {author_name}, generate {amount} that reflect the key concepts likely discussed in that chapter. Assume each chapter explores ideas related to its title as part of the book's overarching themes.
+
+{chapters}
+
+        Return one entry per chapter, in the order given, with the chapter title exactly as given. Each question has exactly 3 options, and correct_answer is the index (0-2) of the correct option.
+        """
+
+def salvage_questions(questions: Any) -> List[QuizQuestion]:
+    """Keep the valid questions of a generated pool, dropping malformed ones"""
+    if not isinstance(questions, list):
+        return []
+    pool = []
+    for q in questions:
+        try:
+            pool.append(validate_question(q))
+        except (ValueError, TypeError) as e:
+            metrics.incr("quiz.pool.invalid_question")
+            print(f"Dropping invalid question from pool: {e}")
+    return pool
+
+def parse_quiz_response(response_content: str) -> List[QuizQuestion]:
+    """
+    Valid questions from a structured reply (a bare array is accepted too).
+    Raises json.JSONDecodeError if the reply isn't JSON.
+    """
+    data = json.loads(response_content)
+    if isinstance(data, dict):
+        data = data.get("questions")
+    return salvage_questions(data)
+
+def parse_chapters_quiz_response(response_content: str, chapter_names: List[str]) -> Dict[str, List[QuizQuestion]]:
+    """
+    Valid questions per chapter from a multi-chapter reply. Each chapter is
+    salvaged on its own, so one malformed chapter doesn't discard the others;
+    chapters missing from the reply get an empty list.
+    Raises json.JSONDecodeError if the reply isn't JSON.
+    """
+    data = json.loads(response_content)
+    items = data.get("chapters") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        items = []
+
+    by_title = {normalize(str(item.get("chapter", ""))): item for item in items if isinstance(item, dict)}
+    found: Dict[str, List[QuizQuestion]] = {}
+    for index, name in enumerate(chapter_names):
+        item = by_title.get(normalize(name))
+        if item is None and index < len(items) and isinstance(items[index], dict):
+            # Fall back to position when the model rewrote the title
+            item = items[index]
+        found[name] = salvage_questions(item.get("questions")) if item else []
+    return found
+
+def quiz_model_tiers() -> List[Tuple[str, float]]:
+    """(model, timeout) pairs from QUIZ_MODEL_TIERS, fastest first"""
+    timeouts = settings.QUIZ_MODEL_TIMEOUTS_SECONDS or [60.0]
+    return [
+        (model, timeouts[min(index, len(timeouts) - 1)])
+        for index, model in enumerate(settings.QUIZ_MODEL_TIERS)
+    ]
+
+def quiz_attempt_plan() -> List[Tuple[str, float]]:
+    """
+    (model, timeout) per generation attempt: one attempt per tier, then the
+    last tier repeats up to QUIZ_GENERATION_MAX_ATTEMPTS attempts in total.
+    """
+    tiers = quiz_model_tiers()
+    attempts = max(settings.QUIZ_GENERATION_MAX_ATTEMPTS, len(tiers))
+    return [tiers[min(index, len(tiers) - 1)] for index in range(attempts)]
+
+def _record_tier(model: str, outcome: str, started: float, escalated: bool) -> None:
+    """Per-tier latency plus success/timeout/invalid and escalation counters"""
+    metrics.observe(f"quiz.tier.{model}.latency_seconds", time.perf_counter() - started)
+    metrics.incr(f"quiz.tier.{model}.{outcome}")
+    if escalated:
+        metrics.incr(f"quiz.tier.{model}.escalated")
+
+async def _complete(model: str, timeout: float, prompt: str, response_format: Dict[str, Any]) -> str:
+    completion = await create_chat_completion(
+        timeout=timeout,
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        response_format=response_format
+    )
+    return completion.choices[0].message.content
+
+async def generate_quiz_questions(book_name: str, author_name: str, chapter_name: str) -> Tuple[List[QuizQuestion], str]:
+    """
+    Generate a chapter's question pool within QUIZ_GENERATION_BUDGET_SECONDS.
+    Valid questions are kept from every reply; while fewer than
+    QUESTIONS_PER_QUIZ are valid, the next attempt (escalating through the
+    model tiers) asks only for the missing ones. Returns the pool and the
+    model of the last attempt.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.QUIZ_GENERATION_BUDGET_SECONDS
+    plan = quiz_attempt_plan()
+    pool: List[QuizQuestion] = []
+    error: Optional[Exception] = None
+
+    for index, (model, timeout) in enumerate(plan):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        has_next = index < len(plan) - 1
+        missing = settings.QUIZ_POOL_SIZE - len(pool)
+        prompt = build_quiz_prompt(book_name, author_name, chapter_name, count=missing, exclude=[q.question for q in pool])
+        started = time.perf_counter()
+        try:
+            found = parse_quiz_response(await _complete(model, min(timeout, remaining), prompt, QUIZ_RESPONSE_FORMAT))
+        except asyncio.TimeoutError as e:
+            error = e
+            _record_tier(model, "timeout", started, has_next)
+            continue
+        except ValueError as e:  # Includes json.JSONDecodeError
+            error = e
+            _record_tier(model, "invalid", started, has_next)
+            continue
+        except CircuitOpen as e:
+            # No later tier can get through either
+            error = e
+            _record_tier(model, "rejected", started, False)
+            break
+
+        if len(found) < missing:
+            metrics.incr("quiz.pool.salvaged")
+        pool.extend(found)
+        enough = len(pool) >= QUESTIONS_PER_QUIZ
+        _record_tier(model, "success" if enough else "invalid", started, not enough and has_next)
+        if enough:
+            return pool, model
+
+    metrics.incr("quiz.generation.failed")
+    if isinstance(error, CircuitOpen) or (error is not None and not pool):
+        raise error
+    raise ValueError(f"Only {len(pool)} valid questions, need at least {QUESTIONS_PER_QUIZ}")
+
+async def generate_chapters_quiz_questions(
+    book_name: str,
+    author_name: str,
+    chapter_names: List[str],
+) -> Tuple[Dict[str, List[QuizQuestion]], Dict[str, str], Dict[str, str]]:
+    """
+    Generate quizzes for several chapters of a book with a single completion
+    per attempt. Valid questions are kept per chapter, and only chapters still
+    short of QUESTIONS_PER_QUIZ are retried (escalating through the model tiers)
+    within QUIZ_GENERATION_BUDGET_SECONDS. Returns (questions, errors, model)
+    keyed by chapter name.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.QUIZ_GENERATION_BUDGET_SECONDS
+    plan = quiz_attempt_plan()
+    pools: Dict[str, List[QuizQuestion]] = {name: [] for name in chapter_names}
+    models: Dict[str, str] = {}
+    remaining_chapters = list(dict.fromkeys(chapter_names))
+    error: Optional[Exception] = None
+
+    for index, (model, timeout) in enumerate(plan):
+        remaining = deadline - loop.time()
+        if remaining <= 0 or not remaining_chapters:
+            break
+        has_next = index < len(plan) - 1
+        started = time.perf_counter()
+        # Like the single-chapter path, retries ask each chapter only for its
+        # missing questions and exclude the ones it already has
+        retrying = any(pools[name] for name in remaining_chapters)
+        try:
+            prompt = build_chapters_quiz_prompt(
+                book_name,
+                author_name,
+                remaining_chapters,
+                counts={name: settings.QUIZ_POOL_SIZE - len(pools[name]) for name in remaining_chapters} if retrying else None,
+                exclude={name: [q.question for q in pools[name]] for name in remaining_chapters if pools[name]}
+            )
+            found = parse_chapters_quiz_response(
+                await _complete(model, min(timeout, remaining), prompt, CHAPTERS_RESPONSE_FORMAT),
+                remaining_chapters
+            )
+        except (asyncio.TimeoutError, ValueError) as e:
+            error = e
+            _record_tier(model, "timeout" if isinstance(e, asyncio.TimeoutError) else "invalid", started, has_next)
+            continue
+        except CircuitOpen as e:
+            # Keep the chapters already complete; the rest fail with the breaker's error
+            error = e
+            _record_tier(model, "rejected", started, False)
+            break
+
+        for name, questions in found.items():
+            pools[name].extend(questions)
+            if questions:
+                models[name] = model
+        remaining_chapters = [name for name in remaining_chapters if len(pools[name]) < QUESTIONS_PER_QUIZ]
+        _record_tier(model, "invalid" if remaining_chapters else "success", started, bool(remaining_chapters) and has_next)
+
+    quizzes = {name: pool for name, pool in pools.items() if len(pool) >= QUESTIONS_PER_QUIZ}
+    if not quizzes and error is not None:
+        raise error
+    reason = str(error) if error else f"Fewer than {QUESTIONS_PER_QUIZ} valid questions"
+    errors = {name: reason or "Timed out" for name in remaining_chapters}
+    metrics.incr("quiz.generation.failed", len(errors))
+    return quizzes, errors, models
+
+async def _stream_tier(model: str, timeout: float, prompt: str) -> AsyncIterator[QuizQuestion]:
+    """
+    Stream one completion and yield each question as soon as its JSON object
+    is complete and valid. Raises CallTimeout (an asyncio.TimeoutError) once
+    `timeout` seconds (or what's left of the request deadline) have passed
+    since the request started.
+    """
+    timeout = bounded(timeout)
+    async with openai_breaker.guard(), openai_limiter.slot():
+        async for question in _stream_completion(model, timeout, prompt):
+            yield question
+
+async def _stream_completion(model: str, timeout: float, prompt: str) -> AsyncIterator[QuizQuestion]:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    started = time.perf_counter()
+    stream = await create_chat_completion(
+        timeout=timeout,
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        response_format=QUIZ_RESPONSE_FORMAT,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    usage, outcome = None, "error"
+    try:
+        items = JSONArrayItemStream()
+        chunks = stream.__aiter__()
+        while True:
+            try:
+                chunk = await asyncio.wait_for(chunks.__anext__(), max(deadline - loop.time(), 0))
+            except StopAsyncIteration:
+                outcome = "success"
+                return
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                raise CallTimeout(f"{model} stream timed out after {timeout:.1f}s") from None
+            if chunk.usage:
+                usage = chunk.usage
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            for item in items.feed(delta):
+                try:
+                    yield validate_question(item)
+                except (ValueError, TypeError) as e:
+                    metrics.incr("quiz.stream.invalid_question")
+                    print(f"Skipping invalid streamed question: {e}")
+    finally:
+        await stream.close()
+        record_llm_call(model=model, outcome=outcome, usage=usage, latency_seconds=time.perf_counter() - started)
+
+async def stream_quiz_questions(book_name: str, author_name: str, chapter_name: str) -> AsyncIterator[Tuple[QuizQuestion, str]]:
+    """
+    Yield (question, model) pairs as they parse from the streamed completion.
+    If an attempt times out or ends with fewer than QUESTIONS_PER_QUIZ valid
+    questions, the next attempt asks only for the missing ones and continues
+    the stream; questions already sent are kept.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.QUIZ_GENERATION_BUDGET_SECONDS
+    plan = quiz_attempt_plan()
+    sent: List[str] = []
+    for index, (model, timeout) in enumerate(plan):
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        has_next = index < len(plan) - 1
+        prompt = build_quiz_prompt(
+            book_name, author_name, chapter_name, count=settings.QUIZ_POOL_SIZE - len(sent), exclude=sent
+        )
+        started = time.perf_counter()
+        outcome = "success"
+        try:
+            async for question in _stream_tier(model, min(timeout, remaining), prompt):
+                sent.append(question.question)
+                yield question, model
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+
+        if len(sent) >= QUESTIONS_PER_QUIZ:
+            # Enough for a quiz, even if the pool was cut short
+            _record_tier(model, outcome, started, False)
+            return
+        if outcome == "success":
+            outcome = "invalid"
+        _record_tier(model, outcome, started, has_next)
+
+    metrics.incr("quiz.generation.failed")
+    raise ValueError(f"Only {len(sent)} valid questions, need at least {QUESTIONS_PER_QUIZ}")
+
+def get_cached_quiz(db: Session, cache_key: str, include_expired: bool = False) -> Optional[Quiz]:
+    """Cached quiz for the key, unless it's older than QUIZ_CACHE_MAX_AGE_DAYS (and `include_expired` is off)"""
+    query = db.query(Quiz).filter(Quiz.cache_key == cache_key)
+    if settings.QUIZ_CACHE_MAX_AGE_DAYS is not None and not include_expired:
+        query = query.filter(Quiz.created_at >= datetime.utcnow() - timedelta(days=settings.QUIZ_CACHE_MAX_AGE_DAYS))
+    return query.first()
+
+def get_cached_quiz_keys(db: Session, cache_keys: List[str]) -> Set[str]:
+    """Which of the given cache keys already have a usable quiz, in one query"""
+    if not cache_keys:
+        return set()
+    query = db.query(Quiz.cache_key).filter(Quiz.cache_key.in_(cache_keys))
+    if settings.QUIZ_CACHE_MAX_AGE_DAYS is not None:
+        query = query.filter(Quiz.created_at >= datetime.utcnow() - timedelta(days=settings.QUIZ_CACHE_MAX_AGE_DAYS))
+    return {cache_key for (cache_key,) in query}
+
+def get_cached_quizzes(db: Session, cache_keys: List[str]) -> Dict[str, Quiz]:
+    """Usable cached quizzes for many keys in one query, keyed by cache key"""
+    if not cache_keys:
+        return {}
+    query = db.query(Quiz).filter(Quiz.cache_key.in_(cache_keys))
+    if settings.QUIZ_CACHE_MAX_AGE_DAYS is not None:
+        query = query.filter(Quiz.created_at >= datetime.utcnow() - timedelta(days=settings.QUIZ_CACHE_MAX_AGE_DAYS))
+    return {quiz.cache_key: quiz for quiz in query}
+
+def save_quiz(
+    db: Session,
+    *,
+    book_name: str,
+    author_name: str,
+    chapter_name: str,
+    questions: List[QuizQuestion],
+    book_id: Optional[str] = None,
+    chapter_number: Optional[int] = None,
+    model: Optional[str] = None,
+    commit: bool = True,
+) -> int:
+    """
+    Insert or replace the question pool for a chapter; returns the quiz ID.
+    Pass commit=False to batch several saves into one transaction.
+    """
+    values = {
+        "cache_key": quiz_cache_key(book_name, author_name, chapter_name),
+        "book_name": book_name,
+        "author_name": author_name,
+        "chapter_name": chapter_name,
+        "prompt_version": PROMPT_VERSION,
+        "book_id": book_id,
+        "chapter_number": chapter_number,
+        "questions": [q.model_dump() for q in questions],
+        "model": model,
+        "created_at": datetime.utcnow(),
+    }
+    stmt = insert(Quiz).values(**values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Quiz.cache_key],
+        set_={k: stmt.excluded[k] for k in ("questions", "model", "created_at", "book_id", "chapter_number")}
+    ).returning(Quiz.id)
+    quiz_id = db.execute(stmt).scalar_one()
+    if commit:
+        db.commit()
+    return quiz_id
+
+def sample_pool(pool_size: int, count: int = QUESTIONS_PER_QUIZ, seen: Set[int] = frozenset()) -> List[int]:
+    """Indexes of `count` random questions from a pool, preferring ones not in `seen`"""
+    unseen = [i for i in range(pool_size) if i not in seen]
+    if len(unseen) >= count:
+        return random.sample(unseen, count)
+    repeats = [i for i in range(pool_size) if i in seen]
+    return unseen + random.sample(repeats, min(count - len(unseen), len(repeats)))
+
+def record_seen(db: Session, user_id: int, quiz_id: int, served: List[int], seen: Set[int], pool_size: int) -> None:
+    """Remember which pool questions a user has been served; starts over once they've seen the whole pool"""
+    seen = seen | set(served)
+    if len(seen) >= pool_size:
+        seen = set(served)
+    stmt = insert(QuizView).values(
+        user_id=user_id,
+        quiz_id=quiz_id,
+        seen_indexes=sorted(seen),
+        updated_at=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuizView.user_id, QuizView.quiz_id],
+        set_={"seen_indexes": stmt.excluded.seen_indexes, "updated_at": stmt.excluded.updated_at}
+    )
+    db.execute(stmt)
+    db.commit()
+
+def serve_from_pool(db: Session, quiz_id: int, pool: List[Dict[str, Any]], user_id: Optional[int] = None) -> List[QuizQuestion]:
+    """
+    Sample QUESTIONS_PER_QUIZ questions from a stored pool. With a user ID,
+    questions that user has already seen are avoided until the pool runs out.
+    """
+    if user_id is None:
+        return [QuizQuestion(**pool[i]) for i in sample_pool(len(pool))]
+
+    view = db.query(QuizView).filter(QuizView.user_id == user_id, QuizView.quiz_id == quiz_id).first()
+    seen = set(view.seen_indexes) if view else set()
+    served = sample_pool(len(pool), seen=seen)
+    record_seen(db, user_id, quiz_id, served, seen, len(pool))
+    metrics.incr("quiz.pool.repeats", sum(1 for i in served if i in seen))
+    return [QuizQuestion(**pool[i]) for i in served]
+
+async def serve_cached_quiz(
+    db: Session,
+    book_name: str,
+    author_name: str,
+    chapter_name: str,
+    user_id: Optional[int] = None,
+    include_expired: bool = False,
+) -> Optional[List[QuizQuestion]]:
+    """
+    Questions sampled from the chapter's cached pool, or None on a cache miss.
+    `include_expired` also serves pools past QUIZ_CACHE_MAX_AGE_DAYS, the
+    fallback while the OpenAI breaker is open.
+    """
+    cache_key = quiz_cache_key(book_name, author_name, chapter_name)
+    cached = await run_blocking(get_cached_quiz, db, cache_key, include_expired)
+    if not cached:
+        metrics.incr("quiz.cache.miss")
+        return None
+    metrics.incr("quiz.cache.expired_hit" if include_expired else "quiz.cache.hit")
+    record_llm_call(outcome="cache_hit", cache_hit=True)
+    return await run_blocking(serve_from_pool, db, cached.id, cached.questions, user_id)
+
+async def get_or_generate_quiz(
+    db: Session,
+    *,
+    book_name: str,
+    author_name: str,
+    chapter_name: str,
+    book_id: Optional[str] = None,
+    chapter_number: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> List[QuizQuestion]:
+    """
+    Serve a quiz for a chapter, sampled from the chapter's cached question pool.
+    The pool is generated with the LLM only for the first reader (or once the
+    cached copy has expired). Pass `user_id` to avoid repeating questions.
+    While the OpenAI breaker is open an expired pool is served if there is one.
+    """
+    served = await serve_cached_quiz(db, book_name, author_name, chapter_name, user_id)
+    if served is not None:
+        return served
+
+    # Don't hold a pooled connection through generation; the save checks out a new one
+    await run_blocking(db.close)
+    try:
+        questions, model = await generate_quiz_questions(book_name, author_name, chapter_name)
+    except CircuitOpen:
+        if settings.QUIZ_CACHE_MAX_AGE_DAYS is None:
+            raise
+        served = await serve_cached_quiz(db, book_name, author_name, chapter_name, user_id, include_expired=True)
+        if served is None:
+            raise
+        return served
+    quiz_id = await run_blocking(
+        save_quiz,
+        db,
+        book_name=book_name,
+        author_name=author_name,
+        chapter_name=chapter_name,
+        questions=questions,
+        book_id=book_id,
+        chapter_number=chapter_number,
+        model=model,
+    )
+    return await run_blocking(serve_from_pool, db, quiz_id, [q.model_dump() for q in questions], user_id)
+
+def _save_chapter_quizzes(
+    db: Session,
+    book_name: str,
+    author_name: str,
+    book_id: Optional[str],
+    chapters: List[Dict[str, Any]],
+    quizzes: Dict[str, List[QuizQuestion]],
+    models: Dict[str, str],
+) -> None:
+    for chapter in chapters:
+        questions = quizzes.get(chapter["chapter_name"])
+        if questions:
+            save_quiz(
+                db,
+                book_name=book_name,
+                author_name=author_name,
+                chapter_name=chapter["chapter_name"],
+                questions=questions,
+                book_id=book_id,
+                chapter_number=chapter.get("chapter_number"),
+                model=models.get(chapter["chapter_name"]),
+                commit=False,
+            )
+    db.commit()
+
+async def get_or_generate_quizzes(
+    db: Session,
+    *,
+    book_name: str,
+    author_name: str,
+    chapters: List[Dict[str, Any]],
+    book_id: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Quizzes for many chapters of one book, each sampled from the chapter's
+    question pool. Cached chapters are read in one
+    query; the rest are generated QUIZ_PREGEN_CHAPTERS_PER_REQUEST chapters per
+    completion, with at most QUIZ_BATCH_MAX_CONCURRENCY completions in flight.
+    Chapters are validated independently, so a failure only affects its own
+    chapter (or its completion's group) and is reported in that chapter's result.
+    """
+    keys = {c["chapter_name"]: quiz_cache_key(book_name, author_name, c["chapter_name"]) for c in chapters}
+    cached = await run_blocking(get_cached_quizzes, db, list(set(keys.values())))
+    metrics.incr("quiz.cache.hit", sum(1 for key in keys.values() if key in cached))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for chapter in chapters:
+        quiz = cached.get(keys[chapter["chapter_name"]])
+        if quiz:
+            record_llm_call(outcome="cache_hit", cache_hit=True)
+            pool = quiz.questions
+            results[chapter["chapter_name"]] = {
+                "status": "ready",
+                "cached": True,
+                "questions": [pool[i] for i in sample_pool(len(pool))]
+            }
+
+    missing = list({c["chapter_name"]: c for c in chapters if c["chapter_name"] not in results}.values())
+    if missing:
+        metrics.incr("quiz.cache.miss", len(missing))
+        await run_blocking(db.close)  # Release the connection while the LLM calls run
+        size = max(settings.QUIZ_PREGEN_CHAPTERS_PER_REQUEST, 1)
+        groups = [missing[start:start + size] for start in range(0, len(missing), size)]
+        semaphore = asyncio.Semaphore(settings.QUIZ_BATCH_MAX_CONCURRENCY)
+
+        async def generate(group: List[Dict[str, Any]]):
+            async with semaphore:
+                return await generate_chapters_quiz_questions(
+                    book_name, author_name, [c["chapter_name"] for c in group]
+                )
+
+        outcomes = await asyncio.gather(*(generate(group) for group in groups), return_exceptions=True)
+
+        generated: Dict[str, List[QuizQuestion]] = {}
+        generated_models: Dict[str, str] = {}
+        for group, outcome in zip(groups, outcomes):
+            if isinstance(outcome, Exception):
+                print(f"Quiz batch group failed: {outcome}")
+                for chapter in group:
+                    results[chapter["chapter_name"]] = {"status": "failed", "error": f"Failed to generate quiz: {str(outcome)}"}
+                continue
+            quizzes, errors, models = outcome
+            generated.update(quizzes)
+            generated_models.update(models)
+            for name, pool in quizzes.items():
+                results[name] = {
+                    "status": "ready",
+                    "cached": False,
+                    "questions": [pool[i] for i in sample_pool(len(pool))]
+                }
+            for name, error in errors.items():
+                results[name] = {"status": "failed", "error": f"Invalid question format: {error}"}
+
+        if generated:
+            await run_blocking(_save_chapter_quizzes, db, book_name, author_name, book_id, missing, generated, generated_models)
+
+    return [{**chapter, **results[chapter["chapter_name"]]} for chapter in chapters]
+
+def _save_pool_in_new_session(user_id: Optional[int], served: int, **kwargs) -> None:
+    with SessionLocal() as db:
+        quiz_id = save_quiz(db, **kwargs)
+        if user_id is not None:
+            record_seen(db, user_id, quiz_id, list(range(served)), set(), len(kwargs["questions"]))
+
+async def stream_quiz(
+    served: Optional[List[QuizQuestion]],
+    *,
+    book_name: str,
+    author_name: str,
+    chapter_name: str,
+    book_id: Optional[str] = None,
+    chapter_number: Optional[int] = None,
+    user_id: Optional[int] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Quiz events for the streaming endpoint: one `question` event per question,
+    then a `done` (or `error`) event.
+
+    `served` holds questions already sampled from a cached pool. Otherwise the
+    first QUESTIONS_PER_QUIZ questions are sent as soon as they parse, the rest
+    of the pool is collected and the pool is cached before `done`.
+    Uses its own DB session since it outlives the request's dependencies.
+    """
+    if served is not None:
+        for index, question in enumerate(served):
+            yield {"type": "question", "index": index, "question": question.model_dump()}
+        yield {"type": "done", "cached": True, "count": len(served)}
+        return
+
+    pool: List[QuizQuestion] = []
+    model = None
+    try:
+        async for question, model in stream_quiz_questions(book_name, author_name, chapter_name):
+            if len(pool) < QUESTIONS_PER_QUIZ:
+                yield {"type": "question", "index": len(pool), "question": question.model_dump()}
+            pool.append(question)
+    except Exception as e:
+        print(f"Quiz stream failed: {e}")
+        yield {"type": "error", "detail": f"Failed to generate quiz: {str(e)}", "count": min(len(pool), QUESTIONS_PER_QUIZ)}
+        return
+
+    count = min(len(pool), QUESTIONS_PER_QUIZ)
+    if len(pool) >= QUESTIONS_PER_QUIZ:
+        await run_blocking(
+            _save_pool_in_new_session,
+            user_id,
+            count,
+            book_name=book_name,
+            author_name=author_name,
+            chapter_name=chapter_name,
+            questions=pool,
+            book_id=book_id,
+            chapter_number=chapter_number,
+            model=model,
+        )
+    yield {"type": "done", "cached": False, "count": count}
+
+def toc_chapters(toc: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Chapter entries of a parsed TOC as {"number", "title"}"""
+    return [
+        {"number": entry.get("number"), "title": entry["title"]}
+        for entry in toc
+        if entry.get("type") == "chapter" and entry.get("title")
+    ]
+
+def enqueue_quiz_pregeneration(
+    db: Session,
+    *,
+    book_id: str,
+    book_name: str,
+    author_name: str,
+    toc: List[Dict[str, Any]],
+) -> int:
+    """
+    Queue quiz generation for every chapter of a TOC that isn't cached yet,
+    QUIZ_PREGEN_CHAPTERS_PER_REQUEST chapters per job. Returns the number of jobs.
+    """
+    chapters = toc_chapters(toc)
+    cached = get_cached_quiz_keys(db, [quiz_cache_key(book_name, author_name, c["title"]) for c in chapters])
+    chapters = [c for c in chapters if quiz_cache_key(book_name, author_name, c["title"]) not in cached]
+    if not chapters:
+        return 0
+
+    size = max(settings.QUIZ_PREGEN_CHAPTERS_PER_REQUEST, 1)
+    payloads = {
+        f"quiz:{book_id}:{start}": {
+            "book_id": book_id,
+            "book_name": book_name,
+            "author_name": author_name,
+            "chapters": chapters[start:start + size],
+        }
+        for start in range(0, len(chapters), size)
+    }
+    enqueue_jobs(db, kind=QUIZ_PREGEN_JOB, payloads_by_key=payloads)
+    metrics.incr("quiz.pregen.chapters_queued", len(chapters))
+    return len(payloads)
+
+def get_pregeneration_progress(db: Session, book_id: str) -> Dict[str, Any]:
+    """How many of a book's TOC chapters have a cached quiz, and how many jobs are still pending"""
+    toc = db.query(TableOfContents).filter(TableOfContents.book_id == book_id).first()
+    chapters = toc_chapters(toc.content) if toc else []
+    numbers = [c["number"] for c in chapters if c["number"] is not None]
+
+    ready = 0
+    if numbers:
+        ready = db.query(func.count(func.distinct(Quiz.chapter_number))).filter(
+            Quiz.book_id == book_id,
+            Quiz.prompt_version == PROMPT_VERSION,
+            Quiz.chapter_number.in_(numbers)
+        ).scalar()
+
+    pending_jobs = db.query(func.count(Job.id)).filter(
+        Job.kind == QUIZ_PREGEN_JOB,
+        Job.dedupe_key.like(f"quiz:{book_id}:%"),
+        Job.status.in_(ACTIVE_STATUSES)
+    ).scalar()
+
+    return {
+        "book_id": book_id,
+        "chapters": len(chapters),
+        "ready": ready,
+        "pending_jobs": pending_jobs,
+    }
+
+@asynccontextmanager
+async def quiz_generation_slot(book_id: str) -> AsyncIterator[bool]:
+    """
+    Take one of QUIZ_PREGEN_MAX_CONCURRENT_PER_BOOK lease slots for a book, so
+    a long TOC can't occupy every worker at once. Yields False when all slots
+    are taken.
+    """
+    for slot in range(settings.QUIZ_PREGEN_MAX_CONCURRENT_PER_BOOK):
+        async with try_lease(f"quiz-slot:{book_id}:{slot}") as acquired:
+            if acquired:
+                yield True
+                return
+    yield False
+
+def _get_uncached_chapters(book_name: str, author_name: str, chapters: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    with SessionLocal() as db:
+        cached = get_cached_quiz_keys(
+            db, [quiz_cache_key(book_name, author_name, c["title"]) for c in chapters]
+        )
+    return [c for c in chapters if quiz_cache_key(book_name, author_name, c["title"]) not in cached]
+
+def _save_pregenerated_quizzes(
+    book_name: str,
+    author_name: str,
+    book_id: str,
+    chapters: List[Dict[str, Any]],
+    quizzes: Dict[str, List[QuizQuestion]],
+    models: Dict[str, str],
+) -> None:
+    with SessionLocal() as db:
+        _save_chapter_quizzes(
+            db,
+            book_name,
+            author_name,
+            book_id,
+            [{"chapter_name": c["title"], "chapter_number": c["number"]} for c in chapters],
+            quizzes,
+            models,
+        )
+
+@job_handler(QUIZ_PREGEN_JOB)
+async def run_quiz_pregen_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Generate and cache quizzes for a group of chapters of one book"""
+    book_id = payload["book_id"]
+    book_name = payload["book_name"]
+    author_name = payload["author_name"]
+
+    async with quiz_generation_slot(book_id) as acquired:
+        if not acquired:
+            raise RetryJob(QUIZ_PREGEN_SLOT_RETRY_SECONDS, f"Quiz pre-generation for {book_id} at concurrency cap")
+
+        # Sync queries go through run_blocking so the event loop never waits on them
+        chapters = await run_blocking(_get_uncached_chapters, book_name, author_name, payload["chapters"])
+        if not chapters:
+            return {"book_id": book_id, "generated": 0, "skipped": len(payload["chapters"])}
+
+        quizzes, errors, models = await generate_chapters_quiz_questions(
+            book_name, author_name, [c["title"] for c in chapters]
+        )
+
+        await run_blocking(_save_pregenerated_quizzes, book_name, author_name, book_id, chapters, quizzes, models)
+
+    metrics.incr("quiz.pregen.chapters_generated", len(quizzes))
+    metrics.incr("quiz.pregen.chapters_failed", len(errors))
+    if not quizzes:
+        raise ValueError(f"No valid quizzes generated: {errors}")
+    # Chapters that failed validation are generated on demand when a reader asks
+    return {"book_id": book_id, "generated": len(quizzes), "errors": errors}
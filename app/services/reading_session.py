@@ -1,8 +1,14 @@
+from collections import defaultdict
 from datetime import datetime
 from typing import List, Optional
-from sqlalchemy.orm import Session
+from sqlalchemy import desc, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 from fastapi import HTTPException
 
+from app.core.config import get_settings
+
 from app.models.reading_session import ReadingSession, Interval
 from app.schemas.reading_session import (
   ReadingSessionCreate, 
@@ -11,17 +17,39 @@ from app.schemas.reading_session import (
   SessionStatus,
   ChapterData,
 )
-from app.crud.base import CRUDBase
+from app.crud.base import AsyncCRUDBase
 from app.services.book_progress import BookProgressService
 
 WORK_INTERVAL = 25 * 60      # 25 minutes in seconds
 SHORT_BREAK = 5 * 60         # 5 minutes in seconds
 LONG_BREAK = 15 * 60         # 15 minutes in seconds
 
-class ReadingSessionService(CRUDBase[ReadingSession, ReadingSessionCreate, ReadingSessionCreate]):
-	def create_session(
+settings = get_settings()
+
+def intervals_limit(requested: Optional[int] = None) -> Optional[int]:
+	"""Intervals to return per session: the lower of the request's limit and READING_SESSION_MAX_INTERVALS"""
+	limits = [limit for limit in (requested, settings.READING_SESSION_MAX_INTERVALS) if limit is not None]
+	return min(limits) if limits else None
+
+async def load_latest_intervals(db: AsyncSession, sessions: List[ReadingSession], limit: int) -> None:
+	"""Attach each session's `limit` most recent intervals, in one query for all sessions"""
+	by_session = defaultdict(list)
+	if sessions and limit > 0:
+		ranked = select(
+			Interval,
+			func.row_number().over(partition_by=Interval.session_id, order_by=desc(Interval.id)).label("rank")
+		).where(Interval.session_id.in_([session.id for session in sessions])).subquery()
+		latest = aliased(Interval, ranked)
+		result = await db.scalars(select(latest).where(ranked.c.rank <= limit).order_by(latest.id))
+		for interval in result:
+			by_session[interval.session_id].append(interval)
+	for session in sessions:
+		set_committed_value(session, "intervals", by_session[session.id])
+
+class ReadingSessionService(AsyncCRUDBase[ReadingSession, ReadingSessionCreate, ReadingSessionCreate]):
+	async def create_session(
 		self, 
-		db: Session, 
+		db: AsyncSession, 
 		*, 
 		user_id: int, 
 		book_id: str,
@@ -36,13 +64,13 @@ class ReadingSessionService(CRUDBase[ReadingSession, ReadingSessionCreate, Readi
 			status=SessionStatus.IN_PROGRESS,
 			started_at=datetime.now(),
 			intervals_count=0,
+			intervals=[],  # Loaded (empty) up front so serializing the response doesn't lazy-load
 		)
 		db.add(db_obj)
-		db.commit()
-		db.refresh(db_obj)
+		await db.commit()
 		return db_obj
 
-	def start_new_interval(self, db: Session, *, session_id: int, interval_type: IntervalType) -> Interval:
+	async def start_new_interval(self, db: AsyncSession, *, session_id: int, interval_type: IntervalType) -> Interval:
 		duration = {
 			IntervalType.WORK: WORK_INTERVAL,
 			IntervalType.SHORT_BREAK: SHORT_BREAK,
@@ -57,50 +85,62 @@ class ReadingSessionService(CRUDBase[ReadingSession, ReadingSessionCreate, Readi
 			started_at=datetime.now()
 		)
 			
-		session = db.query(ReadingSession).filter(ReadingSession.id == session_id).first()
+		session = await db.get(ReadingSession, session_id)
 		session.intervals_count += 1
 		
 		db.add(interval)
-		db.commit()
-		db.refresh(interval)
+		await db.commit()
+		await db.refresh(interval)
 		return interval
 
-	def pause_interval(self, db: Session, *, interval_id: int, remaining_time: int) -> Interval:
-		interval = db.query(Interval).filter(Interval.id == interval_id).first()
+	async def pause_interval(self, db: AsyncSession, *, interval_id: int, remaining_time: int) -> Interval:
+		interval = await db.get(Interval, interval_id)
 		if interval:
 			interval.status = IntervalStatus.PAUSED
 			interval.remaining_time = remaining_time
-			db.commit()
-			db.refresh(interval)
+			await db.commit()
+			await db.refresh(interval)
 		return interval
 	
-	def resume_interval(self, db: Session, *, interval_id: int) -> Interval:
-		interval = db.query(Interval).filter(Interval.id == interval_id).first()
+	async def resume_interval(self, db: AsyncSession, *, interval_id: int) -> Interval:
+		interval = await db.get(Interval, interval_id)
 		if interval:
 			interval.status = IntervalStatus.ACTIVE
-			db.commit()
-			db.refresh(interval)
+			await db.commit()
+			await db.refresh(interval)
 		return interval
 	
-	def complete_interval(self, db: Session, *, interval_id: int) -> Interval:
-		interval = db.query(Interval).filter(Interval.id == interval_id).first()
+	async def complete_interval(self, db: AsyncSession, *, interval_id: int) -> Interval:
+		interval = await db.get(Interval, interval_id)
 		if interval:
 			interval.status = IntervalStatus.COMPLETED
 			interval.completed_at = datetime.now()
 			interval.remaining_time = 0
-			db.commit()
-			db.refresh(interval)
+			await db.commit()
+			await db.refresh(interval)
 		return interval
 
 	@staticmethod
-	async def complete_session(db: Session, session_id: int, user_id: int) -> ReadingSession:
-		session = db.query(ReadingSession).filter(
+	async def complete_session(
+		db: AsyncSession,
+		session_id: int,
+		user_id: int,
+		max_intervals: Optional[int] = None
+	) -> ReadingSession:
+		limit = intervals_limit(max_intervals)
+		query = select(ReadingSession).where(
 			ReadingSession.id == session_id,
 			ReadingSession.user_id == user_id
-		).first()
+		)
+		if limit is None:
+			# One session: its intervals come back in the same query
+			query = query.options(joinedload(ReadingSession.intervals))
+		session = (await db.execute(query)).unique().scalar_one_or_none()
 		
 		if not session:
 			raise HTTPException(status_code=404, detail="Reading session not found")
+		if limit is not None:
+			await load_latest_intervals(db, [session], limit)
 			
 		session.status = SessionStatus.COMPLETED
 		session.completed_at = datetime.now()
@@ -113,14 +153,26 @@ class ReadingSessionService(CRUDBase[ReadingSession, ReadingSessionCreate, Readi
 			chapter_number=session.chapter_number
 		)
 		
-		db.commit()
-		db.refresh(session)
+		await db.commit()
 		return session
 
-	def get_active_sessions(self, db: Session, user_id: int) -> List[ReadingSession]:
-		return db.query(ReadingSession).filter(
+	async def get_active_sessions(
+		self,
+		db: AsyncSession,
+		user_id: int,
+		max_intervals: Optional[int] = None
+	) -> List[ReadingSession]:
+		limit = intervals_limit(max_intervals)
+		query = select(ReadingSession).where(
 			ReadingSession.user_id == user_id,
 			ReadingSession.status == SessionStatus.IN_PROGRESS
-		).all()
+		)
+		if limit is None:
+			# Intervals are part of the response; load them for all sessions in one extra query
+			query = query.options(selectinload(ReadingSession.intervals))
+		sessions = list(await db.scalars(query))
+		if limit is not None:
+			await load_latest_intervals(db, sessions, limit)
+		return sessions
 
 reading_session_service = ReadingSessionService(ReadingSession) 
\ No newline at end of file
@@ -0,0 +1,227 @@
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any, List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.db.locks import try_lease
+from app.models.table_of_contents import TableOfContents
+from app.models.table_of_contents_failure import TableOfContentsFailure
+from app.services.book import fetch_toc_text, parse_toc_to_json, TocScrapeFailure
+from app.services.toc_parser import parse_many
+from app.services.book_catalog import get_or_fetch_book
+from app.services.browser_pool import BrowserPoolSaturated
+from app.services.jobs import job_handler, enqueue_job_async, enqueue_jobs, get_active_jobs, RetryJob
+from app.services.quiz import enqueue_quiz_pregeneration
+from app.utils.executor import run_blocking
+from app.utils.metrics import metrics
+from app.utils.singleflight import SingleFlight
+
+settings = get_settings()
+
+TOC_JOB = "toc.scrape"
+
+# Seconds to wait before retrying when another worker holds the book's scrape lock
+TOC_LOCK_RETRY_SECONDS = 5
+
+toc_scrapes = SingleFlight("toc.scrape")
+
+async def get_stored_toc(db: AsyncSession, book_id: str) -> Optional[TableOfContents]:
+	return await db.scalar(select(TableOfContents).where(TableOfContents.book_id == book_id))
+
+def save_toc(db: Session, book_id: str, content: List[Dict[str, Any]], raw_text: Optional[str] = None) -> None:
+	"""Insert or replace the TOC for a book; book_id is unique"""
+	stmt = insert(TableOfContents).values(book_id=book_id, content=content, raw_text=raw_text)
+	stmt = stmt.on_conflict_do_update(
+		index_elements=[TableOfContents.book_id],
+		set_={"content": stmt.excluded.content, "raw_text": stmt.excluded.raw_text}
+	)
+	db.execute(stmt)
+	db.commit()
+
+async def get_active_toc_failure(db: AsyncSession, book_id: str) -> Optional[TableOfContentsFailure]:
+	"""Failure record for a book that is still inside its backoff window"""
+	return await db.scalar(select(TableOfContentsFailure).where(
+		TableOfContentsFailure.book_id == book_id,
+		TableOfContentsFailure.next_retry_at > datetime.utcnow()
+	))
+
+def failure_backoff(attempts: int) -> timedelta:
+	seconds = settings.TOC_FAILURE_BACKOFF_BASE_SECONDS * (2 ** max(attempts - 1, 0))
+	return timedelta(seconds=min(seconds, settings.TOC_FAILURE_BACKOFF_MAX_SECONDS))
+
+def record_toc_failure(db: Session, book_id: str, failure: TocScrapeFailure) -> TableOfContentsFailure:
+	now = datetime.utcnow()
+	record = db.get(TableOfContentsFailure, book_id)
+	if record:
+		record.attempts += 1
+	else:
+		record = TableOfContentsFailure(book_id=book_id, attempts=1)
+		db.add(record)
+	record.reason = failure.reason.value
+	record.message = failure.message[:1000]
+	record.last_attempt_at = now
+	record.next_retry_at = now + failure_backoff(record.attempts)
+	db.commit()
+	return record
+
+def reparse_stored_tocs(db: Session, batch_size: int = 500) -> int:
+	"""Re-run the parser over every stored TOC that kept its raw text"""
+	updated = 0
+	last_id = 0
+	while True:
+		rows = db.query(TableOfContents).filter(
+			TableOfContents.raw_text.isnot(None),
+			TableOfContents.id > last_id
+		).order_by(TableOfContents.id).limit(batch_size).all()
+		if not rows:
+			return updated
+		for toc, content in zip(rows, parse_many(row.raw_text for row in rows)):
+			toc.content = content
+		db.commit()
+		updated += len(rows)
+		last_id = rows[-1].id
+
+async def request_toc_scrape(db: AsyncSession, book_id: str) -> int:
+	"""
+	Queue a TOC scrape for a book and return the job ID. Concurrent misses for
+	the same book, in this process or any other, get the same job: the partial
+	unique index on active jobs' dedupe_key lets only one insert through.
+	"""
+	return await enqueue_job_async(
+		db,
+		kind=TOC_JOB,
+		payload={"book_id": book_id},
+		dedupe_key=f"toc:{book_id}"
+	)
+
+def get_toc_batch(db: Session, book_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+	"""
+	Look up TOCs for many books at once. Each book resolves to one of:
+	ready (with toc), failed (negative-cached), pending (scrape already queued)
+	or queued (scrape queued by this call). Uses one IN query per step and only
+	queues work for books that have nothing in flight.
+	"""
+	book_ids = list(dict.fromkeys(book_ids))
+	results: Dict[str, Dict[str, Any]] = {}
+
+	for toc in db.query(TableOfContents).filter(TableOfContents.book_id.in_(book_ids)):
+		results[toc.book_id] = {"status": "ready", "toc": toc.content}
+
+	misses = [book_id for book_id in book_ids if book_id not in results]
+	if misses:
+		failures = db.query(TableOfContentsFailure).filter(
+			TableOfContentsFailure.book_id.in_(misses),
+			TableOfContentsFailure.next_retry_at > datetime.utcnow()
+		)
+		for failure in failures:
+			results[failure.book_id] = {
+				"status": "failed",
+				"reason": failure.reason,
+				"next_retry_at": failure.next_retry_at
+			}
+
+	misses = [book_id for book_id in misses if book_id not in results]
+	if misses:
+		active = get_active_jobs(db, [f"toc:{book_id}" for book_id in misses])
+		for book_id in misses:
+			job = active.get(f"toc:{book_id}")
+			if job:
+				results[book_id] = {"status": "pending", "job_id": job.id}
+
+	misses = [book_id for book_id in misses if book_id not in results]
+	if misses:
+		job_ids = enqueue_jobs(
+			db,
+			kind=TOC_JOB,
+			payloads_by_key={f"toc:{book_id}": {"book_id": book_id} for book_id in misses}
+		)
+		for book_id in misses:
+			results[book_id] = {"status": "queued", "job_id": job_ids.get(f"toc:{book_id}")}
+
+	return {book_id: results[book_id] for book_id in book_ids}
+
+# Sync writes of the TOC job, run through run_blocking so they don't stall the
+# event loop (the API's, when RUN_WORKER_IN_PROCESS is on)
+
+def _record_failure(book_id: str, failure: TocScrapeFailure) -> datetime:
+	with SessionLocal() as db:
+		# Read before the session closes; the commit expired the record
+		return record_toc_failure(db, book_id, failure).next_retry_at
+
+def _store_toc(book_id: str, toc: List[Dict[str, Any]], raw_text: str, book_title: str, author_name: str) -> int:
+	"""Save the TOC, clear its failure record and queue quiz pre-generation; returns the quiz job count"""
+	with SessionLocal() as db:
+		save_toc(db, book_id, toc, raw_text=raw_text)
+		db.query(TableOfContentsFailure).filter(
+			TableOfContentsFailure.book_id == book_id
+		).delete()
+		db.commit()
+
+		if not settings.QUIZ_PREGEN_ENABLED:
+			return 0
+		# Every chapter a reader could quiz on is known now; generate ahead of time
+		return enqueue_quiz_pregeneration(
+			db,
+			book_id=book_id,
+			book_name=book_title,
+			author_name=author_name,
+			toc=toc
+		)
+
+async def _scrape_and_store(book_id: str) -> Dict[str, Any]:
+	async with AsyncSessionLocal() as db:
+		if await get_stored_toc(db, book_id):
+			return {"book_id": book_id, "skipped": True}
+		# A retried or requeued job must not scrape again inside the backoff window
+		failure = await get_active_toc_failure(db, book_id)
+		if failure:
+			return {
+				"book_id": book_id,
+				"failed": failure.reason,
+				"next_retry_at": failure.next_retry_at.isoformat()
+			}
+		book_details = await get_or_fetch_book(db, book_id)
+
+	authors = book_details["volumeInfo"].get("authors") or []
+	book_title = book_details["volumeInfo"]["title"]
+	author_name = authors[0] if authors else ""
+	try:
+		toc_text = await fetch_toc_text(
+			book_title=book_title,
+			author_name=author_name
+		)
+	except BrowserPoolSaturated as e:
+		raise RetryJob(e.retry_after, str(e))
+
+	if isinstance(toc_text, TocScrapeFailure):
+		next_retry_at = await run_blocking(_record_failure, book_id, toc_text)
+		metrics.incr(f"toc.failure.{toc_text.reason.value}")
+		return {
+			"book_id": book_id,
+			"failed": toc_text.reason.value,
+			"next_retry_at": next_retry_at.isoformat()
+		}
+
+	# Parse the scraped text to JSON format with chapter numbers
+	toc_data = parse_toc_to_json(toc_text)
+
+	quiz_jobs = await run_blocking(_store_toc, book_id, toc_data["toc"], toc_text, book_title, author_name)
+	return {"book_id": book_id, "entries": len(toc_data["toc"]), "quiz_jobs": quiz_jobs}
+
+async def _scrape_book_once(book_id: str) -> Dict[str, Any]:
+	# The lease keeps other workers/dynos from scraping the same book
+	# concurrently, e.g. after a stale job was requeued while still running.
+	async with try_lease(f"toc:{book_id}") as acquired:
+		if not acquired:
+			raise RetryJob(TOC_LOCK_RETRY_SECONDS, f"TOC scrape for {book_id} already running elsewhere")
+		return await _scrape_and_store(book_id)
+
+@job_handler(TOC_JOB)
+async def run_toc_job(payload: Dict[str, Any]) -> Dict[str, Any]:
+	"""Scrape the TOC for a book from Barnes & Noble and store it"""
+	book_id = payload["book_id"]
+	return await toc_scrapes.do(book_id, lambda: _scrape_book_once(book_id))
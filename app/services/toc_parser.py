@@ -0,0 +1,182 @@
+"""
+Table of contents parser.
+
+Turns raw TOC text (one entry per line, as scraped from Barnes & Noble) into
+structured entries in a single pass over the lines. All patterns are compiled
+once at import, and every numbered line shape is one alternation, so each line
+is classified by a single regex match.
+
+Entry shape (all entries): {"type", "title", "page", "level"}; chapters also
+carry "number" and subsections carry "section_number".
+
+- section:    "Part 1", "Part Two: The Desert", "Book the First"      (level 0)
+- chapter:    "1 Title 12", "Chapter 4: Title", "IV. Title", "CHAPTER XII" (level 1)
+- subsection: "1.2 Title 14", or a numbered line indented under a chapter (level 2)
+- intro:      front matter such as "Introduction", "Preface", "Prologue"   (level 1)
+- other:      anything else, e.g. "Acknowledgments", "Index"              (level 1)
+"""
+import re
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional
+
+WORD_NUMBERS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "thirteen": 13,
+    "fourteen": 14, "fifteen": 15, "sixteen": 16, "seventeen": 17, "eighteen": 18,
+    "nineteen": 19, "twenty": 20,
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5, "sixth": 6,
+    "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+}
+ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+
+_NUMBER = r"(?:\d+|[ivxlcdm]+|" + "|".join(WORD_NUMBERS) + r")"
+_SEPARATOR = r"(?:\s*[.:\-–—]\s*|\s+|$)"
+# Well-formed Roman numerals up to 399. D and M are left out: no TOC has that
+# many chapters, and it keeps initials and names ("M. Proust", "DC Comics",
+# "MD Anderson") from reading as numerals
+_ROMAN = r"(?=[IVXLC])C{0,3}(?:XC|XL|L?X{0,3})(?:IX|IV|V?I{0,3})"
+
+# Every numbered line shape in one alternation; the named group that closes
+# last (match.lastgroup) says which one matched. Upper-case Roman numerals need
+# punctuation ("IV. Title") unless they are two or more characters long, so
+# titles like "I Am Legend" aren't chapters.
+LINE_RE = re.compile(
+    r"(?i:(?:part|book|section|volume)\s+(?:the\s+)?(?P<section_num>" + _NUMBER + r")\b" + _SEPARATOR + r")(?P<section>.*)"
+    r"|(?i:(?:chapter|chap\.|ch\.)\s*(?P<chapter_num>" + _NUMBER + r")\b" + _SEPARATOR + r")(?P<chapter>.*)"
+    r"|(?P<subsection_num>\d+(?:\.\d+)+)\.?\s+(?P<subsection>.+)"
+    r"|(?P<numbered_num>\d{1,3})(?:\s*[.:)\-–—]\s*|\s+)(?P<numbered>\S.*)"
+    r"|(?:(?P<roman_num>" + _ROMAN + r")[.:)]\s*|(?P<roman_num2>(?=[IVXLC]{2})" + _ROMAN + r")\s+)(?P<roman>\S.*)"
+)
+TRAILING_PAGE_RE = re.compile(
+    r"^(?P<title>.*?\S)(?:\s*(?:\.\s*){2,}|\s*…+\s*|\s+)(?P<page>\d{1,4}|(?=[ivx])x{0,3}(?:ix|iv|v?i{0,3}))$"
+)
+INTRO_RE = re.compile(
+    r"^(?:an?\s+|the\s+)?(?:introduction|introductory|timeline|preface|prologue|foreword|"
+    r"forward|prelude|overture|author'?s note|note to the reader|before you begin)\b",
+    re.IGNORECASE,
+)
+
+_PAGE_END_CHARS = frozenset("0123456789ivx")
+_LEADER_CHARS = " \t\f\v\xa0.…"  # Dotted leaders and the whitespace around them
+
+
+@lru_cache(maxsize=1024)
+def roman_to_int(value: str) -> Optional[int]:
+    total, previous = 0, 0
+    for char in reversed(value.lower()):
+        current = ROMAN_VALUES.get(char)
+        if current is None:
+            return None
+        total = total - current if current < previous else total + current
+        previous = max(previous, current)
+    return total or None
+
+
+@lru_cache(maxsize=1024)
+def to_number(value: str) -> Optional[int]:
+    if value.isdigit():
+        return int(value)
+    lowered = value.lower()
+    if lowered in WORD_NUMBERS:
+        return WORD_NUMBERS[lowered]
+    return roman_to_int(lowered)
+
+
+def split_page(text: str):
+    """Split a trailing page number (and any dotted leader) off a title"""
+    if not text or text[-1] not in _PAGE_END_CHARS:
+        return text, None
+    # Fast path for the common "Title 12" / "Title . . . 12": a whitespace-separated
+    # page token; everything else goes through the regex
+    parts = text.rsplit(None, 1)
+    if len(parts) == 2 and parts[1].isdecimal() and len(parts[1]) <= 4:
+        return parts[0].rstrip(_LEADER_CHARS), int(parts[1])
+    match = TRAILING_PAGE_RE.match(text)
+    if not match:
+        return text, None
+    page = match.group("page")
+    # Roman front-matter pages (ix, xiv) are stripped but not kept as ints
+    return match.group("title").rstrip(" .…"), int(page) if page.isdigit() else None
+
+
+def parse_toc_lines(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    toc: List[Dict[str, Any]] = []
+    last_chapter_number = 0
+    chapter_indent: Optional[int] = None
+    append = toc.append
+    match_line = LINE_RE.match
+
+    for raw in lines:
+        line = raw.strip()
+        if not line:
+            continue
+
+        match = match_line(line)
+        kind = match.lastgroup if match else None
+
+        if kind == "section":
+            title, page = line, None
+            rest = match.group("section")
+            if rest:
+                # Only look for a page after the section number, not in "Part 1" itself
+                rest, page = split_page(rest)
+                title = line[:match.start("section")] + rest
+            append({"type": "section", "title": title, "page": page, "level": 0})
+            chapter_indent = None
+
+        elif kind == "chapter":
+            number = to_number(match.group("chapter_num")) or last_chapter_number + 1
+            title, page = split_page(match.group("chapter").strip())
+            last_chapter_number = number
+            chapter_indent = len(raw) - len(raw.lstrip())
+            append({"type": "chapter", "number": number, "title": title or line, "page": page, "level": 1})
+
+        elif kind == "subsection":
+            title, page = split_page(match.group("subsection"))
+            append({
+                "type": "subsection",
+                "section_number": match.group("subsection_num"),
+                "title": title,
+                "page": page,
+                "level": 2,
+            })
+
+        elif kind == "numbered":
+            title, page = split_page(match.group("numbered"))
+            indent = len(raw) - len(raw.lstrip())
+            if chapter_indent is not None and indent > chapter_indent:
+                append({
+                    "type": "subsection",
+                    "section_number": f"{last_chapter_number}.{match.group('numbered_num')}",
+                    "title": title,
+                    "page": page,
+                    "level": 2,
+                })
+            else:
+                number = int(match.group("numbered_num"))
+                last_chapter_number = number
+                chapter_indent = indent
+                append({"type": "chapter", "number": number, "title": title, "page": page, "level": 1})
+
+        elif kind == "roman":
+            number = roman_to_int(match.group("roman_num") or match.group("roman_num2"))
+            title, page = split_page(match.group("roman"))
+            last_chapter_number = number
+            chapter_indent = len(raw) - len(raw.lstrip())
+            append({"type": "chapter", "number": number, "title": title, "page": page, "level": 1})
+
+        else:
+            title, page = split_page(line)
+            entry_type = "intro" if INTRO_RE.match(title) else "other"
+            append({"type": entry_type, "title": title, "page": page, "level": 1})
+
+    return toc
+
+
+def parse_toc(toc_text: str) -> List[Dict[str, Any]]:
+    return parse_toc_lines(toc_text.split("\n"))
+
+
+def parse_many(toc_texts: Iterable[str]) -> List[List[Dict[str, Any]]]:
+    """Parse a batch of TOC texts, e.g. when reparsing stored TOCs after a parser change"""
+    return [parse_toc(text) for text in toc_texts]
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional, Tuple
+
+from app.core.config import get_settings
+from app.utils.circuit_breaker import CircuitOpen
+from app.utils.metrics import metrics
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Shared tier is optional
+    redis = None
+
+settings = get_settings()
+
+FRESH = "fresh"
+STALE = "stale"
+
+
+class SharedBackend:
+    """Redis-backed second tier shared between workers/dynos."""
+
+    def __init__(self, url: str, namespace: str):
+        self.client = redis.Redis.from_url(url, socket_timeout=0.25, socket_connect_timeout=0.25)
+        self.namespace = namespace
+
+    def _key(self, key: str) -> str:
+        return f"focus-read:{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        try:
+            raw = await self.client.get(self._key(key))
+        except redis.RedisError:
+            return None
+        if raw is None:
+            return None
+        payload = json.loads(raw)
+        return payload["value"], payload["stored_at"]
+
+    async def set(self, key: str, value: Any, stored_at: float, expire_seconds: int) -> None:
+        try:
+            await self.client.set(
+                self._key(key),
+                json.dumps({"value": value, "stored_at": stored_at}),
+                ex=expire_seconds,
+            )
+        except redis.RedisError:
+            pass
+
+
+def get_shared_backend(namespace: str) -> Optional[SharedBackend]:
+    if not settings.REDIS_URL or redis is None:
+        return None
+    return SharedBackend(settings.REDIS_URL, namespace)
+
+
+class TTLCache:
+    """
+    Two-tier cache: an in-process LRU with per-entry TTL in front of an
+    optional shared backend.
+
+    Entries older than `ttl` but younger than `ttl + stale_ttl` are returned
+    as stale so the caller can serve them while refreshing in the background.
+    Expired local entries stay until LRU eviction so `get_expired` can fall
+    back on them while the upstream is down.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: int, stale_ttl: int = 0, backend: Optional[SharedBackend] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.backend = backend
+        self._entries: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, stored_at: float) -> Optional[str]:
+        age = time.time() - stored_at
+        if age < self.ttl:
+            return FRESH
+        if age < self.ttl + self.stale_ttl:
+            return STALE
+        return None
+
+    async def get(self, key: str) -> Tuple[Any, Optional[str]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                state = self._state(entry[1])
+                if state is not None:
+                    self._entries.move_to_end(key)
+                    return entry[0], state
+
+        if self.backend is not None:
+            shared = await self.backend.get(key)
+            if shared is not None:
+                value, stored_at = shared
+                state = self._state(stored_at)
+                if state is not None:
+                    metrics.incr(f"cache.{self.name}.shared_hit")
+                    self._store_local(key, value, stored_at)
+                    return value, state
+
+        return None, None
+
+    def get_expired(self, key: str) -> Optional[Any]:
+        """Local value for `key` regardless of age, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return entry[0] if entry is not None else None
+
+    def _store_local(self, key: str, value: Any, stored_at: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def set(self, key: str, value: Any) -> None:
+        stored_at = time.time()
+        self._store_local(key, value, stored_at)
+        if self.backend is not None:
+            await self.backend.set(key, value, stored_at, self.ttl + self.stale_ttl)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def cached(cache: TTLCache, key_func: Callable[..., str]):
+    """
+    Wrap a coroutine function so its results are served from `cache`.
+
+    Stale hits are returned immediately and refreshed in a background task;
+    only one refresh per key runs at a time. While the upstream's circuit
+    breaker is open, misses fall back to an expired entry if there is one.
+    """
+    refreshing = {}
+
+    def decorator(func):
+        async def refresh(key, args, kwargs):
+            try:
+                await cache.set(key, await func(*args, **kwargs))
+                metrics.incr(f"cache.{cache.name}.refresh")
+            except Exception as e:
+                metrics.incr(f"cache.{cache.name}.refresh_error")
+                print(f"Cache refresh failed for {cache.name}:{key}: {e}")
+            finally:
+                refreshing.pop(key, None)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = key_func(*args, **kwargs)
+            value, state = await cache.get(key)
+
+            if state == FRESH:
+                metrics.incr(f"cache.{cache.name}.hit")
+                return value
+
+            if state == STALE:
+                metrics.incr(f"cache.{cache.name}.stale_hit")
+                if key not in refreshing:
+                    # Keep a reference so the task isn't garbage collected mid-flight
+                    refreshing[key] = asyncio.create_task(refresh(key, args, kwargs))
+                return value
+
+            metrics.incr(f"cache.{cache.name}.miss")
+            try:
+                value = await func(*args, **kwargs)
+            except CircuitOpen:
+                expired = cache.get_expired(key)
+                if expired is None:
+                    raise
+                metrics.incr(f"cache.{cache.name}.expired_hit")
+                return expired
+            await cache.set(key, value)
+            return value
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -0,0 +1,164 @@
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from app.core.config import get_settings
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpen(Exception):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+    def __init__(self, upstream: str, retry_after: int):
+        super().__init__(f"{upstream} is unavailable, retry after {retry_after}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+def counts_as_failure(exc: BaseException) -> bool:
+    """
+    Whether an exception says the upstream is unhealthy. Client errors (4xx,
+    e.g. an unknown book ID) don't count, except 429 Too Many Requests. Neither
+    does our own backpressure (limiter, browser pool, open breakers: anything
+    carrying a `retry_after`), an already expired request deadline, or a call
+    cut short by our own per-call timeout.
+    """
+    if hasattr(exc, "retry_after") or type(exc).__name__ in ("DeadlineExceeded", "CallTimeout"):
+        return False
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        response = getattr(exc, "response", None)
+        status = getattr(response, "status_code", None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status == 429
+    return True
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    After `failure_threshold` consecutive failures the breaker opens and calls
+    fail fast with CircuitOpen. Once `recovery_seconds` have passed it goes
+    half-open and lets a single probe call through: success closes it, failure
+    opens it again.
+    """
+
+    def __init__(self, name: str, failure_threshold: int, recovery_seconds: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            metrics.incr(f"circuit.{self.name}.{state}")
+        self.state = state
+        metrics.gauge(f"circuit.{self.name}.open", 1 if state == OPEN else 0)
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil(self._opened_at + self.recovery_seconds - time.monotonic()))
+
+    def raise_if_open(self) -> None:
+        """Raise CircuitOpen while calls would be rejected, without taking the half-open probe"""
+        if self.state == OPEN and time.monotonic() - self._opened_at < self.recovery_seconds:
+            raise CircuitOpen(self.name, self.retry_after())
+
+    def before_call(self) -> None:
+        """Raise CircuitOpen unless this call may go through"""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.recovery_seconds:
+                metrics.incr(f"circuit.{self.name}.rejected")
+                raise CircuitOpen(self.name, self.retry_after())
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probing:
+                metrics.incr(f"circuit.{self.name}.rejected")
+                raise CircuitOpen(self.name, max(1, math.ceil(self.recovery_seconds)))
+            self._probing = True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._probing = False
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def _record_exception(self, exc: BaseException) -> None:
+        if isinstance(exc, Exception) and counts_as_failure(exc):
+            self.record_failure()
+        else:
+            # Cancelled, or nothing to say about the upstream's health
+            self._probing = False
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Run the block as one call through the breaker; exceptions are classified by counts_as_failure"""
+        self.before_call()
+        try:
+            yield
+        except BaseException as e:
+            self._record_exception(e)
+            raise
+        else:
+            self.record_success()
+
+    async def call(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args,
+        is_failure: Optional[Callable[[Any], bool]] = None,
+        **kwargs,
+    ) -> Any:
+        """
+        Await `func` through the breaker. `is_failure` marks results that count
+        as failures, for callers that report errors as return values.
+        """
+        self.before_call()
+        try:
+            result = await func(*args, **kwargs)
+        except BaseException as e:
+            self._record_exception(e)
+            raise
+        if is_failure is not None and is_failure(result):
+            self.record_failure()
+        else:
+            self.record_success()
+        return result
+
+    def snapshot(self) -> dict:
+        return {"state": self.state, "consecutive_failures": self._failures}
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=settings.CIRCUIT_FAILURE_THRESHOLD,
+        recovery_seconds=settings.CIRCUIT_RECOVERY_SECONDS,
+    )
+
+
+google_books_breaker = _breaker("google_books")
+openai_breaker = _breaker("openai")
+apple_keys_breaker = _breaker("apple_keys")
+barnes_noble_breaker = _breaker("barnes_noble")
+
+breakers = {
+    breaker.name: breaker
+    for breaker in (google_books_breaker, openai_breaker, apple_keys_breaker, barnes_noble_breaker)
+}
@@ -0,0 +1,78 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import Request
+
+from app.core.config import get_settings
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+DEADLINE_HEADER = "X-Request-Timeout"
+
+# Absolute time.monotonic() by which the current request must be answered;
+# None outside a request (jobs, scripts), where only per-call timeouts apply
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised instead of starting an upstream call once the request deadline has passed."""
+
+
+class CallTimeout(asyncio.TimeoutError):
+    """
+    Raised when a call outlives the timeout we gave it (a quiz model tier's
+    budget, or what was left of the request deadline). That's our budget
+    running out, not the upstream failing, so breakers don't count it.
+    """
+
+
+def remaining() -> Optional[float]:
+    deadline = request_deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded(timeout: Optional[float]) -> Optional[float]:
+    """
+    `timeout` capped to what's left of the request deadline.
+    Raises DeadlineExceeded when nothing is left.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        metrics.incr("deadline.exceeded")
+        raise DeadlineExceeded("Request deadline exceeded")
+    return left if timeout is None else min(timeout, left)
+
+
+def route_deadline_seconds(path: str) -> float:
+    """Per-route default from ROUTE_DEADLINES_SECONDS (longest matching prefix wins)"""
+    matches = [prefix for prefix in settings.ROUTE_DEADLINES_SECONDS if path.startswith(prefix)]
+    if not matches:
+        return settings.REQUEST_DEADLINE_SECONDS
+    return settings.ROUTE_DEADLINES_SECONDS[max(matches, key=len)]
+
+
+async def deadline_middleware(request: Request, call_next):
+    """
+    Start the request's deadline clock: the client's X-Request-Timeout (seconds,
+    clamped to REQUEST_DEADLINE_MIN/MAX_SECONDS) or the route's default.
+    """
+    seconds = route_deadline_seconds(request.url.path)
+    header = request.headers.get(DEADLINE_HEADER)
+    if header:
+        try:
+            seconds = min(
+                max(float(header), settings.REQUEST_DEADLINE_MIN_SECONDS),
+                settings.REQUEST_DEADLINE_MAX_SECONDS
+            )
+        except ValueError:
+            pass
+    token = request_deadline.set(time.monotonic() + seconds)
+    try:
+        return await call_next(request)
+    finally:
+        request_deadline.reset(token)
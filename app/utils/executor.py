@@ -0,0 +1,36 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOCKING_POOL_SIZE,
+            thread_name_prefix="blocking",
+        )
+    return _executor
+
+def shutdown_blocking_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Run blocking work (Selenium, CPU-heavy parsing) on a bounded thread pool
+    so it never stalls the event loop. Context variables (route label, request
+    deadline) are carried over to the thread.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_blocking_executor(), partial(context.run, func, *args, **kwargs))
@@ -0,0 +1,41 @@
+from typing import Optional
+import httpx
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        headers={"User-Agent": f"{settings.PROJECT_NAME}/{settings.VERSION}"},
+    )
+
+async def start_http_client() -> None:
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Shared keep-alive client for all outbound HTTP.
+    Created in the app lifespan; built lazily for scripts that run outside it.
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
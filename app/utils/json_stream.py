@@ -0,0 +1,56 @@
+import json
+from typing import Any, List
+
+
+class JSONArrayItemStream:
+    """
+    Incrementally extract objects from a streamed JSON document.
+
+    Feed text chunks as they arrive; every `{...}` that is a direct element of
+    an array is returned as soon as its closing brace is seen. Works for a bare
+    array (`[{...}, {...}]`) as well as a wrapped one (`{"questions": [...]}`),
+    and ignores anything outside brackets such as markdown code fences.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._position = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._item_start = None
+        self._item_depth = 0
+
+    def feed(self, chunk: str) -> List[Any]:
+        items = []
+        for char in chunk:
+            self._buffer.append(char)
+            position = self._position
+            self._position += 1
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                if char == "{" and self._stack and self._stack[-1] == "[" and self._item_start is None:
+                    self._item_start = position
+                    self._item_depth = len(self._stack)
+                self._stack.append(char)
+            elif char in "]}" and self._stack:
+                self._stack.pop()
+                if char == "}" and self._item_start is not None and len(self._stack) == self._item_depth:
+                    text = "".join(self._buffer[self._item_start:position + 1])
+                    self._item_start = None
+                    try:
+                        items.append(json.loads(text))
+                    except json.JSONDecodeError:
+                        pass
+        return items
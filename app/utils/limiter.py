@@ -0,0 +1,179 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.utils.metrics import metrics
+
+settings = get_settings()
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0  # A user is waiting on the response
+    BACKGROUND = 1  # Jobs, pre-generation, refreshes
+
+
+# Priority of the work running in the current task; the job worker sets BACKGROUND
+request_priority: ContextVar[Priority] = ContextVar("request_priority", default=Priority.INTERACTIVE)
+
+
+class UpstreamSaturated(Exception):
+    """Raised when a call can't get an upstream slot within its max wait."""
+
+    def __init__(self, upstream: str, retry_after: int):
+        super().__init__(f"{upstream} is saturated, retry after {retry_after}s")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+class UpstreamLimiter:
+    """
+    Token bucket plus concurrency cap for one upstream API.
+
+    A call needs both a token (refilled at `rate` per second up to `burst`) and
+    one of `concurrency` in-flight slots. Callers that can't be admitted wait in
+    a priority queue (interactive before background, FIFO within a priority)
+    for at most their max wait, then get UpstreamSaturated.
+    """
+
+    def __init__(self, name: str, rate: float, burst: int, concurrency: int):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.concurrency = concurrency
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _can_admit(self) -> bool:
+        self._refill()
+        return self._in_flight < self.concurrency and self._tokens >= 1
+
+    def _admit(self) -> None:
+        self._tokens -= 1
+        self._in_flight += 1
+
+    def _update_gauges(self) -> None:
+        metrics.gauge(f"limiter.{self.name}.in_flight", self._in_flight)
+        metrics.gauge(f"limiter.{self.name}.queued", len(self._waiters))
+
+    def _dispatch(self) -> None:
+        self._wakeup = None
+        while self._waiters:
+            future = self._waiters[0][2]
+            if future.done():  # Timed out or cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if not self._can_admit():
+                break
+            heapq.heappop(self._waiters)
+            self._admit()
+            future.set_result(None)
+
+        if self._waiters and self._in_flight < self.concurrency and self._wakeup is None:
+            # Only waiting on tokens: wake up when the next one is due
+            delay = max((1 - self._tokens) / self.rate, 0.001)
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+        self._update_gauges()
+
+    def _release(self) -> None:
+        self._in_flight -= 1
+        self._dispatch()
+
+    def retry_after(self) -> int:
+        return max(1, math.ceil((len(self._waiters) + 1) / self.rate))
+
+    def _max_wait(self, priority: Priority) -> float:
+        if priority == Priority.BACKGROUND:
+            return settings.LIMITER_BACKGROUND_MAX_WAIT_SECONDS
+        return settings.LIMITER_MAX_WAIT_SECONDS
+
+    async def acquire(self, priority: Optional[Priority] = None, max_wait: Optional[float] = None) -> None:
+        priority = request_priority.get() if priority is None else priority
+        max_wait = self._max_wait(priority) if max_wait is None else max_wait
+        started = time.perf_counter()
+
+        if not self._waiters and self._can_admit():
+            self._admit()
+            self._update_gauges()
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (int(priority), next(self._sequence), future))
+            self._dispatch()
+            try:
+                await asyncio.wait_for(future, max_wait)
+            except asyncio.TimeoutError:
+                metrics.incr(f"limiter.{self.name}.rejected")
+                raise UpstreamSaturated(self.name, self.retry_after())
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self._release()  # Admitted just as the caller went away
+                raise
+
+        waited = time.perf_counter() - started
+        metrics.observe(f"limiter.{self.name}.queue_seconds", waited)
+        metrics.observe(f"limiter.{self.name}.queue_seconds.{priority.name.lower()}", waited)
+
+    @asynccontextmanager
+    async def slot(self, priority: Optional[Priority] = None, max_wait: Optional[float] = None) -> AsyncIterator[None]:
+        await self.acquire(priority, max_wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def state(self) -> Dict[str, float]:
+        self._refill()
+        return {
+            "in_flight": self._in_flight,
+            "queued": len(self._waiters),
+            "tokens": round(self._tokens, 2),
+            "rate": self.rate,
+            "burst": self.burst,
+            "concurrency": self.concurrency,
+        }
+
+
+google_books_limiter = UpstreamLimiter(
+    "google_books",
+    rate=settings.GOOGLE_BOOKS_RATE_PER_SECOND,
+    burst=settings.GOOGLE_BOOKS_BURST,
+    concurrency=settings.GOOGLE_BOOKS_MAX_CONCURRENCY,
+)
+openai_limiter = UpstreamLimiter(
+    "openai",
+    rate=settings.OPENAI_RATE_PER_SECOND,
+    burst=settings.OPENAI_BURST,
+    concurrency=settings.OPENAI_MAX_CONCURRENCY,
+)
+apple_keys_limiter = UpstreamLimiter(
+    "apple_keys",
+    rate=settings.APPLE_KEYS_RATE_PER_SECOND,
+    burst=settings.APPLE_KEYS_BURST,
+    concurrency=settings.APPLE_KEYS_MAX_CONCURRENCY,
+)
+barnes_noble_limiter = UpstreamLimiter(
+    "barnes_noble",
+    rate=settings.BARNES_NOBLE_RATE_PER_SECOND,
+    burst=settings.BARNES_NOBLE_BURST,
+    concurrency=settings.BARNES_NOBLE_MAX_CONCURRENCY,
+)
+
+limiters = {
+    limiter.name: limiter
+    for limiter in (google_books_limiter, openai_limiter, apple_keys_limiter, barnes_noble_limiter)
+}
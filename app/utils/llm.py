@@ -0,0 +1,32 @@
+from typing import Optional
+from openai import AsyncOpenAI
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+_client: Optional[AsyncOpenAI] = None
+
+def _build_client() -> AsyncOpenAI:
+    return AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+
+async def start_openai_client() -> None:
+    global _client
+    if _client is None and settings.OPENAI_API_KEY:
+        _client = _build_client()
+
+async def close_openai_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """
+    Shared OpenAI client; its HTTP connection pool is reused across requests.
+    Created in the app lifespan; built lazily for the worker and scripts.
+    """
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
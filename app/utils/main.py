@@ -1,20 +1,38 @@
 from jose import jwt
-import requests
 from fastapi import HTTPException
 from app.core.config import get_settings
+from app.utils.circuit_breaker import CircuitOpen, apple_keys_breaker
+from app.utils.deadline import bounded
+from app.utils.http import get_http_client
+from app.utils.limiter import apple_keys_limiter
 
 settings = get_settings()
-def fetch_apple_public_keys():
-	response = requests.get(settings.APPLE_PUBLIC_KEYS_URL)
-	if response.status_code != 200:
-		raise HTTPException(
-			status_code=500,
-			detail="Failed to fetch Apple public keys"
-		)
-	return response.json()["keys"]
 
-def verify_apple_token(id_token: str) -> dict:
-    keys = fetch_apple_public_keys()
+# Last keys fetched successfully, served while Apple's breaker is open
+_last_apple_keys = None
+
+async def fetch_apple_public_keys():
+	global _last_apple_keys
+	try:
+		async with apple_keys_breaker.guard(), apple_keys_limiter.slot():
+			response = await get_http_client().get(
+				settings.APPLE_PUBLIC_KEYS_URL,
+				timeout=bounded(settings.HTTP_TIMEOUT_SECONDS)
+			)
+			if response.status_code != 200:
+				raise HTTPException(
+					status_code=500,
+					detail="Failed to fetch Apple public keys"
+				)
+	except CircuitOpen:
+		if _last_apple_keys is None:
+			raise
+		return _last_apple_keys
+	_last_apple_keys = response.json()["keys"]
+	return _last_apple_keys
+
+async def verify_apple_token(id_token: str) -> dict:
+    keys = await fetch_apple_public_keys()
     
     for key in keys:
         try:
@@ -0,0 +1,46 @@
+import threading
+from collections import defaultdict
+from typing import Dict, Any
+
+
+class Metrics:
+    """
+    Minimal in-process metrics registry.
+
+    Counters are monotonically increasing, gauges hold the last value set and
+    timings keep count/total/max so averages can be derived from a snapshot.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def incr(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] += value
+
+    def gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            timing = self._timings.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0})
+            timing["count"] += 1
+            timing["total"] += value
+            timing["max"] = max(timing["max"], value)
+
+    def snapshot(self, prefix: str = "") -> Dict[str, Any]:
+        with self._lock:
+            counters = {k: v for k, v in self._counters.items() if k.startswith(prefix)}
+            gauges = {k: v for k, v in self._gauges.items() if k.startswith(prefix)}
+            timings = {
+                k: {**v, "avg": v["total"] / v["count"] if v["count"] else 0.0}
+                for k, v in self._timings.items() if k.startswith(prefix)
+            }
+        return {"counters": counters, "gauges": gauges, "timings": timings}
+
+
+metrics = Metrics()
@@ -0,0 +1,29 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+from app.utils.metrics import metrics
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls for the same key within a process: the first
+    caller runs the coroutine, everyone arriving while it is in flight awaits
+    the same result (or exception).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        flight = self._flights.get(key)
+        if flight is not None:
+            metrics.incr(f"singleflight.{self.name}.shared")
+            # shield() so one waiter being cancelled doesn't cancel the others
+            return await asyncio.shield(flight)
+
+        flight = asyncio.ensure_future(func())
+        self._flights[key] = flight
+        flight.add_done_callback(lambda _: self._flights.pop(key, None))
+        metrics.incr(f"singleflight.{self.name}.leader")
+        return await asyncio.shield(flight)
@@ -0,0 +1,145 @@
+"""
+Background job worker.
+
+Run with `python -m app.worker`. Polls the jobs table and runs registered
+handlers; several workers can run side by side since claims use SKIP LOCKED.
+"""
+import asyncio
+import signal
+import time
+from datetime import timezone
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+from app.db.pool import db_route
+from app.db.session import SessionLocal, async_engine
+from app.models.job import JobStatus
+from app.services.browser_pool import browser_pool
+from app.services.jobs import HANDLERS, RetryJob, claim_job, complete_job, defer_job, fail_job, requeue_stale_jobs
+from app.services.llm_ledger import ledger_flush_loop, set_llm_endpoint
+from app.utils.circuit_breaker import CircuitOpen
+from app.utils.deadline import request_deadline
+from app.utils.executor import run_blocking, shutdown_blocking_executor
+from app.utils.http import close_http_client
+from app.utils.limiter import Priority, UpstreamSaturated, request_priority
+from app.utils.metrics import metrics
+import app.services.toc  # noqa: F401  Registers TOC handlers
+import app.services.quiz  # noqa: F401  Registers quiz pre-generation handlers
+
+settings = get_settings()
+
+# Job-state updates are sync SQLAlchemy calls; they run in the blocking pool so
+# polling and transitions never stall the event loop (the API's, when
+# RUN_WORKER_IN_PROCESS is on)
+
+def _claim() -> Optional[Tuple[int, str, Dict[str, Any], float]]:
+    with SessionLocal() as db:
+        job = claim_job(db)
+        if not job:
+            return None
+        # run_after is naive UTC
+        queued_for = time.time() - job.run_after.replace(tzinfo=timezone.utc).timestamp() if job.run_after else 0.0
+        return job.id, job.kind, job.payload, queued_for
+
+def _defer(job_id: int, delay: float, reason: str) -> None:
+    with SessionLocal() as db:
+        defer_job(db, job_id, delay, reason)
+
+def _fail(job_id: int, error: str) -> JobStatus:
+    with SessionLocal() as db:
+        return fail_job(db, job_id, error).status
+
+def _complete(job_id: int, result: Optional[Dict[str, Any]]) -> None:
+    with SessionLocal() as db:
+        complete_job(db, job_id, result)
+
+def _requeue_stale() -> int:
+    with SessionLocal() as db:
+        return requeue_stale_jobs(db)
+
+async def run_next_job() -> bool:
+    """Claim and run a single job. Returns False when the queue is empty."""
+    claimed = await run_blocking(_claim)
+    if not claimed:
+        return False
+    job_id, kind, payload, queued_for = claimed
+
+    metrics.observe(f"jobs.{kind}.queue_seconds", max(queued_for, 0.0))
+    set_llm_endpoint(f"job.{kind}")
+    db_route.set(f"job.{kind}")
+    # Jobs queue behind interactive requests for upstream API slots
+    request_priority.set(Priority.BACKGROUND)
+    # Bound upstream calls so a job never outlives its lock and gets run twice
+    request_deadline.set(time.monotonic() + settings.JOB_LOCK_TIMEOUT_SECONDS)
+    started = time.perf_counter()
+    try:
+        result = await HANDLERS[kind](payload)
+    except (RetryJob, UpstreamSaturated, CircuitOpen) as e:
+        delay = e.delay_seconds if isinstance(e, RetryJob) else e.retry_after
+        await run_blocking(_defer, job_id, delay, str(e))
+        metrics.incr(f"jobs.{kind}.deferred")
+    except Exception as e:
+        print(f"Job {job_id} ({kind}) failed: {e}")
+        status = await run_blocking(_fail, job_id, str(e))
+        metrics.incr(f"jobs.{kind}.{'retried' if status == JobStatus.QUEUED else 'failed'}")
+    else:
+        await run_blocking(_complete, job_id, result)
+        metrics.incr(f"jobs.{kind}.succeeded")
+    finally:
+        metrics.observe(f"jobs.{kind}.run_seconds", time.perf_counter() - started)
+    return True
+
+async def worker_loop(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            ran = await run_next_job()
+        except Exception as e:
+            print(f"Worker loop error: {e}")
+            ran = False
+        if not ran:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.WORKER_POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+async def reaper_loop(stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        try:
+            requeued = await run_blocking(_requeue_stale)
+            if requeued:
+                print(f"Requeued {requeued} stale jobs")
+        except Exception as e:
+            print(f"Reaper error: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=settings.JOB_LOCK_TIMEOUT_SECONDS / 2)
+        except asyncio.TimeoutError:
+            pass
+
+async def run_worker(stop: Optional[asyncio.Event] = None) -> None:
+    stop = stop or asyncio.Event()
+    await asyncio.gather(
+        reaper_loop(stop),
+        *(worker_loop(stop) for _ in range(settings.WORKER_CONCURRENCY))
+    )
+
+async def main() -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    print(f"Worker started with concurrency {settings.WORKER_CONCURRENCY}, handlers: {', '.join(HANDLERS)}")
+    if settings.BROWSER_POOL_PREWARM:
+        try:
+            await run_blocking(browser_pool.warm, settings.BROWSER_POOL_PREWARM)
+        except Exception as e:
+            print(f"Browser pool warm-up failed: {e}")
+    try:
+        await asyncio.gather(run_worker(stop), ledger_flush_loop(stop))
+    finally:
+        await run_blocking(browser_pool.close)
+        await close_http_client()
+        await async_engine.dispose()
+        shutdown_blocking_executor()
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,107 @@
+"""
+Benchmark and accuracy check for the TOC parser.
+
+Run from the repository root:
+
+    python -m benchmarks.toc_parser_bench [--iterations N]
+
+The corpus in benchmarks/toc_corpus/ holds one TOC per file, one entry per
+line, each prefixed with its expected type and a tab. Reports parse
+throughput (lines/sec) and per-line classification accuracy for the current
+parser and for the original regex loop it replaced.
+"""
+import argparse
+import re
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from app.services.toc_parser import parse_many
+
+CORPUS_DIR = Path(__file__).parent / "toc_corpus"
+
+
+def load_corpus() -> List[Tuple[str, str, List[str]]]:
+    corpus = []
+    for path in sorted(CORPUS_DIR.glob("*.txt")):
+        lines, expected = [], []
+        for row in path.read_text(encoding="utf-8").splitlines():
+            if not row.strip():
+                continue
+            label, text = row.split("\t", 1)
+            expected.append(label)
+            lines.append(text)
+        corpus.append((path.stem, "\n".join(lines), expected))
+    return corpus
+
+
+def legacy_parse(toc_text: str) -> List[Dict]:
+    """The parser before toc_parser, kept here as the baseline"""
+    toc = []
+    for line in toc_text.split("\n"):
+        if re.match(r"^Part\s\d+", line, re.IGNORECASE):
+            toc.append({"type": "section", "title": line.strip(), "page": None})
+        elif re.match(r"^\d+", line):
+            match = re.match(r"^(\d+)\s+(.*?)\s+(\d+)$", line)
+            if match:
+                toc.append({"type": "chapter", "number": int(match.group(1)), "title": match.group(2).strip(), "page": int(match.group(3))})
+        elif "Timeline" in line or "Introduction" in line:
+            toc.append({"type": "intro", "title": line.strip(), "page": None})
+        else:
+            toc.append({"type": "other", "title": line.strip(), "page": None})
+    return toc
+
+
+def accuracy(results: List[List[Dict]], corpus) -> Tuple[float, Counter]:
+    correct, total, misses = 0, 0, Counter()
+    for entries, (name, _, expected) in zip(results, corpus):
+        got = [entry["type"] for entry in entries]
+        # Lines the parser dropped count as misses
+        got += [None] * (len(expected) - len(got))
+        for want, have in zip(expected, got):
+            total += 1
+            if want == have:
+                correct += 1
+            else:
+                misses[name] += 1
+    return correct / total if total else 0.0, misses
+
+
+def throughput(parse_batch, texts: List[str], iterations: int) -> float:
+    line_count = sum(text.count("\n") + 1 for text in texts)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        parse_batch(texts)
+    elapsed = time.perf_counter() - started
+    return line_count * iterations / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    texts = [text for _, text, _ in corpus]
+    line_count = sum(len(expected) for _, _, expected in corpus)
+    print(f"Corpus: {len(corpus)} TOCs, {line_count} lines, {args.iterations} iterations\n")
+
+    rates = {}
+    for name, parse_batch in (
+        ("toc_parser", parse_many),
+        ("legacy", lambda batch: [legacy_parse(text) for text in batch]),
+    ):
+        acc, misses = accuracy(parse_batch(texts), corpus)
+        rates[name] = throughput(parse_batch, texts, args.iterations)
+        print(f"{name:<12} {rates[name]:>12,.0f} lines/sec   accuracy {acc:6.1%}")
+        for toc_name, count in misses.most_common():
+            print(f"{'':<14}{toc_name}: {count} misclassified")
+
+    # The legacy loop skips most of the work (no pages, levels or subsections),
+    # so it is the ceiling to stay close to rather than a target to beat
+    print(f"\ntoc_parser runs at {rates['toc_parser'] / rates['legacy']:.0%} of legacy throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""unique table_of_contents book_id
+
+Revision ID: 9d2e4b7a1c6f
+Revises: 3f8a6d2c91b4
+Create Date: 2026-10-18 12:21:05.310477
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2e4b7a1c6f'
+down_revision: Union[str, None] = '3f8a6d2c91b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keep the oldest TOC per book before enforcing uniqueness
+    op.execute("""
+        DELETE FROM table_of_contents t
+        USING table_of_contents older
+        WHERE t.book_id = older.book_id
+          AND t.id > older.id
+    """)
+    op.drop_index(op.f('ix_table_of_contents_book_id'), table_name='table_of_contents')
+    op.create_index(op.f('ix_table_of_contents_book_id'), 'table_of_contents', ['book_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_table_of_contents_book_id'), table_name='table_of_contents')
+    op.create_index(op.f('ix_table_of_contents_book_id'), 'table_of_contents', ['book_id'], unique=False)
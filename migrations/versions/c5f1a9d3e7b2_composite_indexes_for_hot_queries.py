@@ -0,0 +1,82 @@
+"""composite indexes for hot queries
+
+Revision ID: c5f1a9d3e7b2
+Revises: 8e3b5d9c4a12
+Create Date: 2026-10-18 21:42:10.518304
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f1a9d3e7b2'
+down_revision: Union[str, None] = '8e3b5d9c4a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Plain indexes on the baseline tables' primary keys, which already have
+# their own unique index
+REDUNDANT_ID_INDEXES = [
+    ('ix_users_id', 'users'),
+    ('ix_book_progress_id', 'book_progress'),
+    ('ix_reading_sessions_id', 'reading_sessions'),
+    ('ix_intervals_id', 'intervals'),
+    ('ix_notes_id', 'notes'),
+    ('ix_table_of_contents_id', 'table_of_contents'),
+]
+
+
+def upgrade() -> None:
+    # Keep one progress row per (user, book) before adding the unique
+    # constraint: the furthest along, then the oldest
+    op.execute("""
+        DELETE FROM book_progress a
+        USING book_progress b
+        WHERE a.user_id = b.user_id
+          AND a.book_id = b.book_id
+          AND (COALESCE(a.current_chapter, 0) < COALESCE(b.current_chapter, 0)
+               OR (COALESCE(a.current_chapter, 0) = COALESCE(b.current_chapter, 0) AND a.id > b.id))
+    """)
+    op.create_unique_constraint('uq_book_progress_user_book', 'book_progress', ['user_id', 'book_id'])
+    op.create_index('ix_book_progress_user_status', 'book_progress', ['user_id', 'status'], unique=False)
+    # book_id is only ever queried together with user_id, which the constraint covers
+    op.drop_index('ix_book_progress_book_id', table_name='book_progress', if_exists=True)
+
+    op.create_index('ix_reading_sessions_user_status', 'reading_sessions', ['user_id', 'status'], unique=False)
+    op.create_index(
+        'ix_reading_sessions_book_chapter',
+        'reading_sessions',
+        ['book_id', 'chapter_number'],
+        unique=False,
+        postgresql_include=['id'],
+    )
+    # Declared on the model but only present on databases built with create_all
+    op.drop_index('ix_reading_sessions_book_id', table_name='reading_sessions', if_exists=True)
+
+    op.create_index(op.f('ix_intervals_session_id'), 'intervals', ['session_id'], unique=False)
+
+    op.create_index(
+        'ix_notes_session_user_created',
+        'notes',
+        ['reading_session_id', 'user_id', sa.text('created_at DESC')],
+        unique=False,
+    )
+
+    for index_name, table_name in REDUNDANT_ID_INDEXES:
+        op.drop_index(index_name, table_name=table_name, if_exists=True)
+
+
+def downgrade() -> None:
+    for index_name, table_name in REDUNDANT_ID_INDEXES:
+        op.create_index(index_name, table_name, ['id'], unique=False)
+
+    op.drop_index('ix_notes_session_user_created', table_name='notes')
+    op.drop_index(op.f('ix_intervals_session_id'), table_name='intervals')
+    op.drop_index('ix_reading_sessions_book_chapter', table_name='reading_sessions')
+    op.drop_index('ix_reading_sessions_user_status', table_name='reading_sessions')
+    op.create_index('ix_book_progress_book_id', 'book_progress', ['book_id'], unique=False)
+    op.drop_index('ix_book_progress_user_status', table_name='book_progress')
+    op.drop_constraint('uq_book_progress_user_book', 'book_progress', type_='unique')
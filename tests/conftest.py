@@ -0,0 +1,22 @@
+"""
+Database tests run against TEST_DATABASE_URL, a throwaway Postgres migrated
+to head (`alembic upgrade head`), and are skipped when it isn't set:
+
+    TEST_DATABASE_URL=postgresql://localhost/focus_read_test python -m pytest
+"""
+import os
+
+import pytest
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+if TEST_DATABASE_URL:
+    # The engines read DATABASE_URL when app.db.session is first imported
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    from app.db.session import engine
+    return engine
@@ -0,0 +1,174 @@
+"""
+Index usage of the hot read queries.
+
+Seeds users, book progress, reading sessions, intervals and notes at
+realistic volumes (500 users x 20 books x 5 sessions) inside one transaction,
+ANALYZEs the tables and EXPLAINs each query shape the API issues. Every query
+must use its expected index and none may fall back to a sequential scan on
+the tables it targets. All seeded rows are rolled back.
+"""
+import json
+from typing import Any, Dict, Iterator, List, NamedTuple
+
+import pytest
+from sqlalchemy import desc, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.engine import Connection
+
+from app.models.book_progress import BookProgress, BookProgressStatus
+from app.models.notes import Notes
+from app.models.reading_session import Interval, ReadingSession, SessionStatus
+
+SEED_USERS = 500
+SEED_BOOKS = 20  # per user
+SEED_SESSIONS = 5  # per book
+SEED_TABLES = ("users", "book_progress", "reading_sessions", "intervals", "notes")
+
+BOOK_ID = "book-10"
+
+
+class Seeded(NamedTuple):
+    connection: Connection
+    user_id: int
+    session_id: int
+    session_ids: List[int]
+
+
+def seed(connection: Connection, users: int, books: int, sessions: int) -> List[int]:
+    user_ids = list(connection.execute(text("""
+        INSERT INTO users (email, username, is_active)
+        SELECT 'explain-check-' || g || '@example.com', 'explain-check-' || g, true
+        FROM generate_series(1, :users) g
+        RETURNING id
+    """), {"users": users}).scalars())
+
+    connection.execute(text("""
+        INSERT INTO book_progress
+            (user_id, book_id, title, total_chapters, current_chapter, status, progress_percentage)
+        SELECT u.id, 'book-' || b, 'Book ' || b, 20, b % 20,
+               CASE WHEN b % 4 = 0 THEN 'COMPLETED' ELSE 'IN_PROGRESS' END::bookprogressstatus, 0
+        FROM unnest(:user_ids) AS u(id) CROSS JOIN generate_series(1, :books) b
+    """), {"user_ids": user_ids, "books": books})
+
+    # Reading sessions are one per chapter read; the last one of some books is still open
+    connection.execute(text("""
+        INSERT INTO reading_sessions
+            (user_id, book_id, chapter_number, chapter_title, chapter_type, status, started_at, intervals_count)
+        SELECT u.id, 'book-' || b, s, 'Chapter ' || s, 'chapter',
+               CASE WHEN s = :sessions AND b % 10 = 0 THEN 'IN_PROGRESS' ELSE 'COMPLETED' END::sessionstatus,
+               now() - (s || ' days')::interval, 4
+        FROM unnest(:user_ids) AS u(id)
+        CROSS JOIN generate_series(1, :books) b
+        CROSS JOIN generate_series(1, :sessions) s
+    """), {"user_ids": user_ids, "books": books, "sessions": sessions})
+
+    connection.execute(text("""
+        INSERT INTO intervals (session_id, type, status, remaining_time, started_at)
+        SELECT rs.id, 'WORK'::intervaltype, 'COMPLETED'::intervalstatus, 0, rs.started_at
+        FROM reading_sessions rs CROSS JOIN generate_series(1, 4)
+        WHERE rs.user_id = ANY(:user_ids)
+    """), {"user_ids": user_ids})
+
+    connection.execute(text("""
+        INSERT INTO notes (user_id, reading_session_id, content, created_at)
+        SELECT rs.user_id, rs.id, 'Note ' || n, rs.started_at + (n || ' minutes')::interval
+        FROM reading_sessions rs CROSS JOIN generate_series(1, 2) n
+        WHERE rs.user_id = ANY(:user_ids)
+    """), {"user_ids": user_ids})
+
+    for table in SEED_TABLES:
+        connection.execute(text(f"ANALYZE {table}"))
+    return user_ids
+
+
+@pytest.fixture(scope="module")
+def seeded(db_engine) -> Iterator[Seeded]:
+    with db_engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            user_ids = seed(connection, SEED_USERS, SEED_BOOKS, SEED_SESSIONS)
+            user_id = user_ids[len(user_ids) // 2]
+            session_ids = list(connection.execute(
+                select(ReadingSession.id).where(ReadingSession.user_id == user_id).limit(20)
+            ).scalars())
+            yield Seeded(connection, user_id, session_ids[0], session_ids)
+        finally:
+            transaction.rollback()
+
+
+def plan_nodes(node: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def explain(connection: Connection, statement) -> Dict[str, Any]:
+    sql = str(statement.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+    return connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar_one()[0]["Plan"]
+
+
+# (statement builder, expected indexes, tables that must not be seq-scanned) per hot query
+QUERY_SHAPES = [
+    pytest.param(
+        lambda s: select(BookProgress).where(BookProgress.user_id == s.user_id, BookProgress.book_id == BOOK_ID),
+        ("uq_book_progress_user_book",),
+        ("book_progress",),
+        id="book progress by user and book",
+    ),
+    pytest.param(
+        lambda s: select(BookProgress).where(
+            BookProgress.user_id == s.user_id,
+            BookProgress.status == BookProgressStatus.IN_PROGRESS
+        ),
+        ("ix_book_progress_user_status",),
+        ("book_progress",),
+        id="books by status",
+    ),
+    pytest.param(
+        lambda s: select(ReadingSession).where(
+            ReadingSession.user_id == s.user_id,
+            ReadingSession.status == SessionStatus.IN_PROGRESS
+        ),
+        ("ix_reading_sessions_user_status",),
+        ("reading_sessions",),
+        id="active reading sessions",
+    ),
+    pytest.param(
+        lambda s: select(Interval).where(Interval.session_id.in_(s.session_ids)),
+        ("ix_intervals_session_id",),
+        ("intervals",),
+        id="intervals of sessions (selectinload)",
+    ),
+    pytest.param(
+        lambda s: select(Notes).where(
+            Notes.reading_session_id == s.session_id,
+            Notes.user_id == s.user_id
+        ).order_by(desc(Notes.created_at)),
+        ("ix_notes_session_user_created",),
+        ("notes",),
+        id="notes of a reading session",
+    ),
+    pytest.param(
+        lambda s: select(Notes).join(ReadingSession, Notes.reading_session_id == ReadingSession.id).where(
+            ReadingSession.book_id == BOOK_ID,
+            Notes.user_id == s.user_id
+        ).order_by(ReadingSession.chapter_number, desc(Notes.created_at)),
+        ("ix_reading_sessions_book_chapter", "ix_notes_session_user_created"),
+        ("reading_sessions", "notes"),
+        id="notes of a book",
+    ),
+]
+
+
+@pytest.mark.parametrize("build, expected_indexes, tables", QUERY_SHAPES)
+def test_query_uses_its_indexes(seeded, build, expected_indexes, tables):
+    plan = explain(seeded.connection, build(seeded))
+    nodes = list(plan_nodes(plan))
+    indexes = {node["Index Name"] for node in nodes if "Index Name" in node}
+    seq_scans = {
+        node["Relation Name"] for node in nodes
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in tables
+    }
+    plan_json = json.dumps(plan, indent=2)
+    assert not [index for index in expected_indexes if index not in indexes], plan_json
+    assert not seq_scans, plan_json
@@ -0,0 +1,100 @@
+"""
+Query budgets of the reading session endpoints.
+
+With DB_QUERY_BUDGET_STRICT on, a request that runs more queries than its
+budget fails with a 500, so these catch N+1 regressions: the mock user gets
+many active sessions with many intervals each, and listing or completing them
+must still fit the budget. Seeded rows are committed (the API reads them over
+its own connections) and deleted afterwards.
+"""
+from typing import Iterator, List
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.db.query_budget import QUERY_COUNT_HEADER, route_query_budget
+
+settings = get_settings()
+
+USER_ID = 1  # deps.get_current_user's mock user
+BOOK_ID = "query-budget-check"
+SESSIONS = 50
+INTERVALS = 20  # per session
+
+
+@pytest.fixture
+def session_ids(db_engine) -> Iterator[List[int]]:
+    with db_engine.begin() as connection:
+        created_user = connection.execute(text("""
+            INSERT INTO users (id, email, username, is_active)
+            VALUES (:user_id, 'test@example.com', 'test_user', true)
+            ON CONFLICT DO NOTHING
+            RETURNING id
+        """), {"user_id": USER_ID}).scalar() is not None
+        connection.execute(text("""
+            INSERT INTO book_progress
+                (user_id, book_id, title, total_chapters, current_chapter, status, progress_percentage)
+            VALUES (:user_id, :book_id, 'Query budget check', :sessions, 0, 'IN_PROGRESS'::bookprogressstatus, 0)
+        """), {"user_id": USER_ID, "book_id": BOOK_ID, "sessions": SESSIONS})
+        ids = list(connection.execute(text("""
+            INSERT INTO reading_sessions
+                (user_id, book_id, chapter_number, chapter_title, chapter_type, status, started_at, intervals_count)
+            SELECT :user_id, :book_id, s, 'Chapter ' || s, 'chapter', 'IN_PROGRESS'::sessionstatus, now(), :intervals
+            FROM generate_series(1, :sessions) s
+            RETURNING id
+        """), {"user_id": USER_ID, "book_id": BOOK_ID, "sessions": SESSIONS, "intervals": INTERVALS}).scalars())
+        connection.execute(text("""
+            INSERT INTO intervals (session_id, type, status, remaining_time, started_at)
+            SELECT rs.id, 'WORK'::intervaltype, 'COMPLETED'::intervalstatus, 0, now()
+            FROM unnest(:session_ids) AS rs(id) CROSS JOIN generate_series(1, :intervals)
+        """), {"session_ids": ids, "intervals": INTERVALS})
+    try:
+        yield ids
+    finally:
+        with db_engine.begin() as connection:
+            connection.execute(text("DELETE FROM intervals WHERE session_id = ANY(:ids)"), {"ids": ids})
+            connection.execute(text("DELETE FROM reading_sessions WHERE id = ANY(:ids)"), {"ids": ids})
+            connection.execute(
+                text("DELETE FROM book_progress WHERE user_id = :user_id AND book_id = :book_id"),
+                {"user_id": USER_ID, "book_id": BOOK_ID}
+            )
+            if created_user:
+                connection.execute(text("DELETE FROM users WHERE id = :user_id"), {"user_id": USER_ID})
+
+
+@pytest.fixture
+def client(db_engine, monkeypatch) -> Iterator[TestClient]:
+    from app.main import app
+    monkeypatch.setattr(settings, "DB_QUERY_BUDGET_STRICT", True)
+    monkeypatch.setattr(settings, "READING_SESSION_MAX_INTERVALS", None)
+    with TestClient(app) as client:
+        yield client
+
+
+def assert_within_budget(response) -> None:
+    assert response.status_code == 200, response.text
+    assert int(response.headers[QUERY_COUNT_HEADER]) <= route_query_budget(response.request.url.path)
+
+
+@pytest.mark.parametrize("max_intervals", [None, 3])
+def test_active_sessions_within_query_budget(client, session_ids, max_intervals):
+    params = {} if max_intervals is None else {"max_intervals": max_intervals}
+    response = client.get(f"{settings.API_V1_STR}/reading-sessions/active", params=params)
+
+    assert_within_budget(response)
+    sessions = [session for session in response.json() if session["book_id"] == BOOK_ID]
+    assert len(sessions) == SESSIONS
+    assert all(len(session["intervals"]) == (max_intervals or INTERVALS) for session in sessions)
+
+
+@pytest.mark.parametrize("max_intervals", [None, 3])
+def test_complete_session_within_query_budget(client, session_ids, max_intervals):
+    params = {} if max_intervals is None else {"max_intervals": max_intervals}
+    response = client.post(f"{settings.API_V1_STR}/reading-sessions/{session_ids[-1]}/complete", params=params)
+
+    assert_within_budget(response)
+    session = response.json()
+    assert session["status"] == "completed"
+    assert len(session["intervals"]) == (max_intervals or INTERVALS)